@@ -7,64 +7,463 @@ Usage: python md2html.py <input_file.md> [output_file.html]
 If no output file is specified, it will use the same name as the input file with .html extension.
 """
 
+import html
 import sys
 import re
 import os
+import unicodedata
 from pathlib import Path
 
+# Block-level line patterns, matched against a line with its container indentation removed
+FENCE_PATTERN = re.compile(r'(`{3,}|~{3,})\s*([^`\s]*)')
+HEADING_PATTERN = re.compile(r'(#{1,6})(?:[ \t]+(.*?))?(?:[ \t]+#+)?[ \t]*$')
+RULE_PATTERN = re.compile(r'(?:(?:-[ \t]*){3,}|(?:\*[ \t]*){3,}|(?:_[ \t]*){3,})$')
+LIST_ITEM_PATTERN = re.compile(r'( *)([-*+]|(\d{1,9})[.)])(?:( +)(.*)|$)')
+
+# Inline patterns, shared by every call instead of being compiled per text run
+INLINE_SPECIAL = re.compile(r'[\\`*_\[\]<&\n]')
+DELIMITER_RUN = re.compile(r'\*+|_+')
+BACKTICK_RUN = re.compile(r'`+')
+ESCAPED_CHAR = re.compile(r'\\([!-/:-@\[-`{-~])')
+LINK_TAIL = re.compile(r'\(\s*(<[^<>\n]*>|[^\s()<>]*)(?:\s+("[^"]*"|\'[^\']*\'))?\s*\)')
+AUTOLINK = re.compile(r'<([A-Za-z][A-Za-z0-9+.-]{1,31}:[^\s<>]*)>')
+INLINE_TAG = re.compile(r'</?[A-Za-z][A-Za-z0-9-]*(?:\s+[A-Za-z_:][\w.:-]*(?:\s*=\s*(?:[^\s"\'=<>`]+|\'[^\'\n]*\'|"[^"\n]*"))?)*\s*/?>')
+ENTITY = re.compile(r'&(?:#[0-9]{1,7}|#[xX][0-9a-fA-F]{1,6}|[A-Za-z][A-Za-z0-9]{1,31});')
+
+def is_punctuation(char):
+    return unicodedata.category(char)[0] in 'PS'
+
+class Delimiter:
+    """A run of * or _ on the delimiter stack, and the emphasis tags it has been matched into."""
+
+    __slots__ = ('char', 'length', 'original_length', 'can_open', 'can_close', 'prev', 'next', 'open_tags', 'close_tags')
+
+    def __init__(self, char, length, can_open, can_close, prev):
+        self.char = char
+        self.length = length
+        self.original_length = length
+        self.can_open = can_open
+        self.can_close = can_close
+        self.prev = prev
+        self.next = None
+        self.open_tags = ''
+        self.close_tags = ''
+
+    def __str__(self):
+        # Closing tags use the start of the run and opening tags its end; unmatched characters stay literal
+        return self.close_tags + self.char * self.length + self.open_tags
+
+class Bracket:
+    """An unmatched [ that may still become the start of a link."""
+
+    __slots__ = ('index', 'delimiter', 'active')
+
+    def __init__(self, index, delimiter):
+        self.index = index
+        # Top of the delimiter stack when the bracket was seen: emphasis inside the link stops here
+        self.delimiter = delimiter
+        self.active = True
+
+class InlineParser:
+    """Tokenizes a run of text in one left-to-right pass.
+    
+    Code spans, escapes, autolinks and raw tags are resolved as they are met, so nothing inside them
+    is read as markup. Runs of * and _ go on a delimiter stack and [ on a bracket stack; emphasis is
+    matched when a link closes and once more at the end, following the CommonMark rules.
+    """
+    
+    def __init__(self, text):
+        self.text = text
+        # Output pieces: strings, plus Delimiter objects rendered once their matches are known
+        self.nodes = []
+        self.last = None
+        self.brackets = []
+        # Start positions of the backtick runs of each length, and how far each list has been consumed
+        self.backtick_runs = None
+        self.backtick_seen = {}
+    
+    def parse(self):
+        """Return the text as HTML."""
+        text = self.text
+        nodes = self.nodes
+        pos = 0
+        while True:
+            found = INLINE_SPECIAL.search(text, pos)
+            if found is None:
+                nodes.append(html.escape(text[pos:], quote=False))
+                break
+            start = found.start()
+            if start > pos:
+                nodes.append(html.escape(text[pos:start], quote=False))
+            char = text[start]
+            if char == '\\':
+                pos = self._escape(start)
+            elif char == '`':
+                pos = self._code_span(start)
+            elif char == '*' or char == '_':
+                pos = self._delimiter_run(start)
+            elif char == '[':
+                nodes.append('[')
+                self.brackets.append(Bracket(len(nodes) - 1, self.last))
+                pos = start + 1
+            elif char == ']':
+                pos = self._close_bracket(start)
+            elif char == '<':
+                pos = self._angle(start)
+            elif char == '&':
+                entity = ENTITY.match(text, start)
+                nodes.append(entity.group() if entity else '&amp;')
+                pos = entity.end() if entity else start + 1
+            else:
+                self._line_break()
+                pos = start + 1
+        self._process_emphasis(None)
+        return ''.join(map(str, nodes))
+    
+    def _escape(self, start):
+        following = self.text[start + 1:start + 2]
+        if following == '\n':
+            self.nodes.append('<br>\n')
+            return start + 2
+        if following and ESCAPED_CHAR.match(self.text, start):
+            self.nodes.append(html.escape(following, quote=False))
+            return start + 2
+        self.nodes.append('\\')
+        return start + 1
+    
+    def _line_break(self):
+        previous = self.nodes[-1] if self.nodes else None
+        if isinstance(previous, str):
+            stripped = previous.rstrip(' ')
+            self.nodes[-1] = stripped
+            # Two or more trailing spaces make a hard line break
+            if len(previous) - len(stripped) >= 2:
+                self.nodes.append('<br>')
+        self.nodes.append('\n')
+    
+    def _code_span(self, start):
+        end = BACKTICK_RUN.match(self.text, start).end()
+        length = end - start
+        if self.backtick_runs is None:
+            self.backtick_runs = {}
+            for run in BACKTICK_RUN.finditer(self.text):
+                self.backtick_runs.setdefault(run.end() - run.start(), []).append(run.start())
+        # Runs before this one can never close a later span, so each list is only walked forward once
+        runs = self.backtick_runs.get(length, [])
+        seen = self.backtick_seen.get(length, 0)
+        while seen < len(runs) and runs[seen] < end:
+            seen += 1
+        self.backtick_seen[length] = seen
+        if seen == len(runs):
+            self.nodes.append(self.text[start:end])
+            return end
+        closer = runs[seen]
+        code = self.text[end:closer].replace('\n', ' ')
+        if code.startswith(' ') and code.endswith(' ') and code.strip(' '):
+            code = code[1:-1]
+        self.nodes.append(f'<code>{html.escape(code, quote=False)}</code>')
+        return closer + length
+    
+    def _delimiter_run(self, start):
+        text = self.text
+        end = DELIMITER_RUN.match(text, start).end()
+        char = text[start]
+        before = text[start - 1] if start else ' '
+        after = text[end] if end < len(text) else ' '
+        before_space, after_space = before.isspace(), after.isspace()
+        before_punct = not before_space and is_punctuation(before)
+        after_punct = not after_space and is_punctuation(after)
+        left_flanking = not after_space and (not after_punct or before_space or before_punct)
+        right_flanking = not before_space and (not before_punct or after_space or after_punct)
+        if char == '*':
+            can_open, can_close = left_flanking, right_flanking
+        else:
+            # _ does not open or close inside a word, so snake_case names stay intact
+            can_open = left_flanking and (not right_flanking or before_punct)
+            can_close = right_flanking and (not left_flanking or after_punct)
+        delimiter = Delimiter(char, end - start, can_open, can_close, self.last)
+        if self.last is not None:
+            self.last.next = delimiter
+        self.last = delimiter
+        self.nodes.append(delimiter)
+        return end
+    
+    def _close_bracket(self, start):
+        if not self.brackets:
+            self.nodes.append(']')
+            return start + 1
+        opener = self.brackets.pop()
+        tail = LINK_TAIL.match(self.text, start + 1) if opener.active else None
+        if tail is None:
+            self.nodes.append(']')
+            return start + 1
+        
+        destination = tail.group(1)
+        if destination.startswith('<'):
+            destination = destination[1:-1]
+        destination = ESCAPED_CHAR.sub(r'\1', destination)
+        attributes = f' href="{html.escape(destination)}"'
+        if tail.group(2):
+            title = ESCAPED_CHAR.sub(r'\1', tail.group(2)[1:-1])
+            attributes += f' title="{html.escape(title)}"'
+        self._process_emphasis(opener.delimiter)
+        self.nodes[opener.index] = f'<a{attributes}>'
+        self.nodes.append('</a>')
+        # Links cannot contain other links
+        for bracket in self.brackets:
+            bracket.active = False
+        return tail.end()
+    
+    def _angle(self, start):
+        autolink = AUTOLINK.match(self.text, start)
+        if autolink:
+            url = autolink.group(1)
+            self.nodes.append(f'<a href="{html.escape(url)}">{html.escape(url, quote=False)}</a>')
+            return autolink.end()
+        tag = INLINE_TAG.match(self.text, start)
+        if tag:
+            self.nodes.append(tag.group())
+            return tag.end()
+        self.nodes.append('&lt;')
+        return start + 1
+    
+    def _remove(self, delimiter):
+        if delimiter.prev is not None:
+            delimiter.prev.next = delimiter.next
+        if delimiter.next is not None:
+            delimiter.next.prev = delimiter.prev
+        else:
+            self.last = delimiter.prev
+    
+    def _process_emphasis(self, bottom):
+        """Match the delimiters above `bottom` into <em>/<strong> and take them off the stack."""
+        closer = self.last
+        first = None
+        while closer is not None and closer is not bottom:
+            first, closer = closer, closer.prev
+        closer = first
+        # Lowest opener worth searching for each kind of closer, so no opener is searched twice in vain
+        openers_bottom = {}
+        while closer is not None:
+            if not closer.can_close:
+                closer = closer.next
+                continue
+            key = (closer.char, closer.can_open, closer.original_length % 3)
+            limit = openers_bottom.get(key, bottom)
+            opener = closer.prev
+            while opener is not None and opener is not bottom and opener is not limit:
+                if opener.char == closer.char and opener.can_open:
+                    total = opener.original_length + closer.original_length
+                    # The "rule of 3" for runs that can both open and close
+                    if not ((opener.can_close or closer.can_open) and total % 3 == 0
+                            and (opener.original_length % 3 or closer.original_length % 3)):
+                        break
+                opener = opener.prev
+            else:
+                opener = None
+            
+            if opener is None:
+                openers_bottom[key] = closer.prev
+                following = closer.next
+                if not closer.can_open:
+                    self._remove(closer)
+                closer = following
+                continue
+            
+            used = 2 if opener.length >= 2 and closer.length >= 2 else 1
+            tag = 'strong' if used == 2 else 'em'
+            opener.length -= used
+            closer.length -= used
+            opener.open_tags = f'<{tag}>' + opener.open_tags
+            closer.close_tags += f'</{tag}>'
+            # Delimiters between the pair can no longer match anything: they stay as literal text
+            opener.next, closer.prev = closer, opener
+            if not opener.length:
+                self._remove(opener)
+            if not closer.length:
+                following = closer.next
+                self._remove(closer)
+                closer = following
+        
+        while self.last is not None and self.last is not bottom:
+            self._remove(self.last)
+
+def convert_inline(text):
+    """Convert inline formatting (emphasis, strong, code spans, links and escapes) in a run of text."""
+    return InlineParser(text).parse()
+
+class ListLevel:
+    """An open list and where the content of its current item starts."""
+
+    def __init__(self, tag, marker_indent, content_indent):
+        self.tag = tag
+        self.marker_indent = marker_indent
+        self.content_indent = content_indent
+        # True while the item's first paragraph has been written without a closing newline
+        self.open_text = False
+
+class BlockParser:
+    """Reads Markdown one line at a time as a state machine, writing HTML fragments to an output buffer.
+    
+    Handles ATX headings, fenced code blocks, horizontal rules, nested ordered and unordered lists
+    and paragraphs; each line is looked at once.
+    """
+    
+    def __init__(self, inline=convert_inline):
+        self.inline = inline
+        self.out = []
+        # Text lines of the paragraph being collected
+        self.paragraph = []
+        # Open lists, outermost first
+        self.lists = []
+        # (fence marker, indentation to strip) while inside a fenced code block
+        self.fence = None
+        self.after_blank = False
+    
+    def feed(self, line):
+        """Process one line of input (without its line ending)."""
+        line = line.expandtabs(4)
+        if self.fence is not None:
+            self._fenced_line(line)
+            return
+        
+        stripped = line.lstrip(' ')
+        if not stripped:
+            self._end_paragraph()
+            self.after_blank = True
+            return
+        indent = len(line) - len(stripped)
+        
+        item = LIST_ITEM_PATTERN.match(line)
+        if item and not RULE_PATTERN.match(stripped) and (item.group(5) or not self.paragraph):
+            self._list_item(item)
+        else:
+            # Close the list items this line is not indented far enough to belong to
+            depth = len(self.lists)
+            while depth and indent < self.lists[depth - 1].content_indent:
+                depth -= 1
+            if depth < len(self.lists):
+                if self.paragraph and not self.after_blank and not self._interrupts_paragraph(stripped):
+                    # A lazy continuation line of the paragraph in the innermost item
+                    self.paragraph.append(stripped)
+                    return
+                self._end_paragraph()
+                self._close_lists(depth)
+            base = self.lists[-1].content_indent if self.lists else 0
+            self._block(line[base:], base)
+        self.after_blank = False
+    
+    def close(self):
+        """Close every open block and return the HTML."""
+        if self.fence is not None:
+            self.out.append('</code></pre>\n')
+            self.fence = None
+        self._end_paragraph()
+        self._close_lists(0)
+        return ''.join(self.out).rstrip('\n')
+    
+    def _write_block(self, fragment):
+        """Write a block-level fragment, separating it from item text written before it."""
+        if self.lists and self.lists[-1].open_text:
+            self.out.append('\n')
+            self.lists[-1].open_text = False
+        self.out.append(fragment)
+    
+    def _interrupts_paragraph(self, text):
+        return bool(FENCE_PATTERN.match(text) or HEADING_PATTERN.match(text) or RULE_PATTERN.match(text))
+    
+    def _block(self, text, base):
+        """Handle a line that is not a list item, relative to the container it belongs to."""
+        stripped = text.lstrip(' ')
+        fence = FENCE_PATTERN.match(stripped)
+        if fence:
+            self._end_paragraph()
+            language = fence.group(2)
+            attributes = f' class="language-{html.escape(language)}"' if language else ''
+            self._write_block(f'<pre><code{attributes}>')
+            self.fence = (fence.group(1), base + len(text) - len(stripped))
+            return
+        heading = HEADING_PATTERN.match(stripped)
+        if heading:
+            self._end_paragraph()
+            level = len(heading.group(1))
+            self._write_block(f"<h{level}>{self.inline(heading.group(2) or '')}</h{level}>\n")
+            return
+        if RULE_PATTERN.match(stripped):
+            self._end_paragraph()
+            self._write_block('<hr>\n')
+            return
+        self.paragraph.append(stripped)
+    
+    def _fenced_line(self, line):
+        marker, indent = self.fence
+        # Remove the fence's own indentation, but never text
+        removable = len(line) - len(line.lstrip(' '))
+        content = line[min(indent, removable):]
+        closing = content.strip()
+        if closing.startswith(marker) and closing == closing[0] * len(closing) and closing[0] == marker[0]:
+            self.out.append('</code></pre>\n')
+            self.fence = None
+            return
+        self.out.append(html.escape(content, quote=False) + '\n')
+    
+    def _end_paragraph(self):
+        if not self.paragraph:
+            return
+        text = self.inline('\n'.join(self.paragraph).rstrip())
+        self.paragraph = []
+        level = self.lists[-1] if self.lists else None
+        if level is not None and not level.open_text and self.out[-1].endswith('<li>'):
+            # The first paragraph of a list item is written bare, as in a tight list
+            self.out.append(text)
+            level.open_text = True
+        else:
+            self._write_block(f'<p>{text}</p>\n')
+    
+    def _list_item(self, item):
+        self._end_paragraph()
+        marker_indent = len(item.group(1))
+        marker = item.group(2)
+        spaces = len(item.group(4) or ' ')
+        if spaces > 4:
+            # Content indented this far is code in CommonMark; treat it as starting one space after the marker
+            spaces = 1
+        content_indent = marker_indent + len(marker) + spaces
+        tag = 'ol' if item.group(3) else 'ul'
+        
+        while self.lists and marker_indent < self.lists[-1].marker_indent:
+            self._close_lists(len(self.lists) - 1)
+        current = self.lists[-1] if self.lists else None
+        if current is not None and marker_indent < current.content_indent and current.tag == tag:
+            # Next item of the same list
+            self.out.append('</li>\n<li>')
+            current.open_text = False
+            current.content_indent = content_indent
+        else:
+            if current is not None and marker_indent < current.content_indent:
+                # A different kind of list at the same level replaces the current one
+                self._close_lists(len(self.lists) - 1)
+            start = int(item.group(3)) if item.group(3) else 1
+            opening = f'<ol start="{start}">' if tag == 'ol' and start != 1 else f'<{tag}>'
+            self._write_block(f'{opening}\n<li>')
+            self.lists.append(ListLevel(tag, marker_indent, content_indent))
+        
+        content = item.group(5) or ''
+        if content.strip():
+            self._block(content, content_indent)
+    
+    def _close_lists(self, depth):
+        """Close open lists until only `depth` remain."""
+        while len(self.lists) > depth:
+            level = self.lists.pop()
+            self.out.append(f'</li>\n</{level.tag}>\n')
+
 def convert_markdown_to_html(markdown_text):
     """Convert markdown text to HTML."""
-    html = markdown_text
-    
-    # Convert headers
-    html = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', html, flags=re.MULTILINE)
-    html = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html, flags=re.MULTILINE)
-    html = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html, flags=re.MULTILINE)
-    html = re.sub(r'^#### (.*?)$', r'<h4>\1</h4>', html, flags=re.MULTILINE)
-    html = re.sub(r'^##### (.*?)$', r'<h5>\1</h5>', html, flags=re.MULTILINE)
-    html = re.sub(r'^###### (.*?)$', r'<h6>\1</h6>', html, flags=re.MULTILINE)
-    
-    # Convert bold and italic
-    html = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html)
-    html = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html)
-    
-    # Convert links
-    html = re.sub(r'\[(.*?)\]\((.*?)\)', r'<a href="\2">\1</a>', html)
-    
-    # Convert code blocks
-    html = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', html, flags=re.DOTALL)
-    html = re.sub(r'`(.*?)`', r'<code>\1</code>', html)
-    
-    # Convert unordered lists
-    # First, find all list blocks
-    list_pattern = re.compile(r'((?:^- .*?\n)+)', re.MULTILINE)
-    list_matches = list_pattern.finditer(html)
-    
-    for match in reversed(list(list_matches)):
-        list_text = match.group(1)
-        list_items = re.findall(r'^- (.*?)$', list_text, re.MULTILINE)
-        list_html = "<ul>\n" + "\n".join([f"  <li>{item}</li>" for item in list_items]) + "\n</ul>"
-        html = html[:match.start()] + list_html + html[match.end():]
-    
-    # Convert ordered lists
-    list_pattern = re.compile(r'((?:^\d+\. .*?\n)+)', re.MULTILINE)
-    list_matches = list_pattern.finditer(html)
-    
-    for match in reversed(list(list_matches)):
-        list_text = match.group(1)
-        list_items = re.findall(r'^\d+\. (.*?)$', list_text, re.MULTILINE)
-        list_html = "<ol>\n" + "\n".join([f"  <li>{item}</li>" for item in list_items]) + "\n</ol>"
-        html = html[:match.start()] + list_html + html[match.end():]
-    
-    # Convert paragraphs (any line that's not already converted)
-    # First, collapse consecutive lines that aren't headers, lists, or code blocks
-    paragraph_pattern = re.compile(r'(?<!\n\n)(?<!<h\d>)(?<!<\/h\d>)(?<!<ul>)(?<!<\/ul>)(?<!<ol>)(?<!<\/ol>)(?<!<pre>)(?<!<\/pre>)(?<!<p>)(?<!<\/p>)^([^<].*?)$(?!\n\n)(?!<h\d>)(?!<\/h\d>)(?!<ul>)(?!<\/ul>)(?!<ol>)(?!<\/ol>)(?!<pre>)(?!<\/pre>)(?!<p>)(?!<\/p>)', re.MULTILINE)
-    html = paragraph_pattern.sub(r'<p>\1</p>', html)
-    
-    # Add horizontal rules
-    html = re.sub(r'^---+$', r'<hr>', html, flags=re.MULTILINE)
-    
-    return html
+    parser = BlockParser()
+    for line in markdown_text.splitlines():
+        parser.feed(line)
+    return parser.close()
 
 def create_html_document(html_body, title="Converted Markdown"):
     """Wrap the converted HTML in a complete HTML document."""
@@ -0,0 +1,283 @@
+# numpy is only needed for vectorized evaluation, so it is imported by load_numpy on first use
+np = None
+
+
+def load_numpy():
+    """Import numpy on first use; returns None when it is not installed."""
+    global np
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        np = numpy
+    return np
+
+
+# Hourly rainfall (mm) above which a rain observation becomes a Heavy Rain Alert
+HEAVY_RAIN_MM = 10
+
+# Indices of the severe conditions (heat, freeze, thunderstorm) in the forecast condition order
+FORECAST_SEVERE_CONDITIONS = [0, 1, 4]
+
+
+def unit_labels(units):
+    """Return the (temperature, speed) unit labels for an OpenWeatherMap units setting."""
+    if units == 'imperial':
+        return "°F", "mph"
+    return "°C", "m/s"
+
+
+def heat_alert(temp, threshold, temp_unit):
+    return {
+        'type': 'severe',
+        'title': 'Extreme Heat Warning',
+        'message': f"Temperature is {temp}{temp_unit}, which exceeds the high temperature threshold of {threshold}{temp_unit}."
+    }
+
+
+def freeze_alert(temp, threshold, temp_unit):
+    return {
+        'type': 'severe',
+        'title': 'Freeze Warning',
+        'message': f"Temperature is {temp}{temp_unit}, which is below the low temperature threshold of {threshold}{temp_unit}."
+    }
+
+
+def wind_alert(wind_speed, threshold, speed_unit):
+    return {
+        'type': 'moderate',
+        'title': 'Wind Advisory',
+        'message': f"Wind speed is {wind_speed}{speed_unit}, which exceeds the threshold of {threshold}{speed_unit}."
+    }
+
+
+def thunderstorm_alert(description):
+    return {
+        'type': 'severe',
+        'title': 'Thunderstorm Warning',
+        'message': f"Thunderstorms detected: {description}. Take necessary precautions."
+    }
+
+
+def heavy_rain_alert(description):
+    return {
+        'type': 'moderate',
+        'title': 'Heavy Rain Alert',
+        'message': f"Heavy rainfall detected: {description}. Be aware of potential flooding."
+    }
+
+
+def observation_fingerprint(weather_data):
+    """Identify an observation by its timestamp plus every field the current-weather alerts read."""
+    conditions = weather_data.get('weather') or [{}]
+    return (
+        weather_data.get('dt'),
+        weather_data.get('main', {}).get('temp'),
+        weather_data.get('wind', {}).get('speed'),
+        conditions[0].get('main'),
+        conditions[0].get('description'),
+        weather_data.get('rain', {}).get('1h'),
+    )
+
+
+class BatchAlertEvaluator:
+    """Evaluates the current-conditions alert thresholds for many locations in one NumPy pass."""
+
+    def __init__(self, thresholds, units):
+        """Create an evaluator for the given alert_thresholds dict and units setting."""
+        if load_numpy() is None:
+            raise ImportError("numpy is required for vectorized alert evaluation")
+        self.thresholds = thresholds
+        self.units = units
+
+    def _load_columns(self, weather_batch):
+        """Copy the fields the thresholds depend on into NumPy columns."""
+        count = len(weather_batch)
+        temps = np.full(count, np.nan)
+        winds = np.full(count, np.nan)
+        rain_1h = np.zeros(count)
+        thunder = np.zeros(count, dtype=bool)
+        raining = np.zeros(count, dtype=bool)
+
+        for i, weather_data in enumerate(weather_batch):
+            if not weather_data:
+                continue
+
+            temp = weather_data.get('main', {}).get('temp')
+            if temp is not None:
+                temps[i] = temp
+
+            wind_speed = weather_data.get('wind', {}).get('speed')
+            if wind_speed is not None:
+                winds[i] = wind_speed
+
+            weather_conditions = weather_data.get('weather', [{}])
+            if weather_conditions:
+                main_condition = weather_conditions[0].get('main')
+                thunder[i] = main_condition == 'Thunderstorm'
+                if main_condition == 'Rain':
+                    raining[i] = True
+                    rain_1h[i] = weather_data.get('rain', {}).get('1h', 0)
+
+        return temps, winds, rain_1h, thunder, raining
+
+    def evaluate(self, weather_batch):
+        """Return a list of alerts per weather payload, matching WeatherAlertSystem.generate_alerts."""
+        temps, winds, rain_1h, thunder, raining = self._load_columns(weather_batch)
+
+        # NaN (missing field) compares False, so absent readings never fire
+        heat = temps > self.thresholds['temp_high']
+        freeze = ~heat & (temps < self.thresholds['temp_low'])
+        windy = winds > self.thresholds['wind_speed']
+        heavy_rain = ~thunder & raining & (rain_1h > HEAVY_RAIN_MM)
+
+        results = [[] for _ in weather_batch]
+        fired = np.flatnonzero(heat | freeze | windy | thunder | heavy_rain)
+        if not len(fired):
+            return results
+
+        temp_unit, speed_unit = unit_labels(self.units)
+        # Only rows with at least one alert are turned back into Python objects
+        for i in fired.tolist():
+            weather_data = weather_batch[i]
+            alerts = results[i]
+            if heat[i]:
+                alerts.append(heat_alert(weather_data['main']['temp'], self.thresholds['temp_high'], temp_unit))
+            elif freeze[i]:
+                alerts.append(freeze_alert(weather_data['main']['temp'], self.thresholds['temp_low'], temp_unit))
+            if windy[i]:
+                alerts.append(wind_alert(weather_data['wind']['speed'], self.thresholds['wind_speed'], speed_unit))
+            if thunder[i]:
+                alerts.append(thunderstorm_alert(weather_data['weather'][0].get('description')))
+            elif heavy_rain[i]:
+                alerts.append(heavy_rain_alert(weather_data['weather'][0].get('description')))
+
+        return results
+
+    def evaluate_forecasts(self, forecast_batch, now):
+        """Return forecast alerts per city, evaluating every step of every city as one array."""
+        step_counts = [len(forecast.get('list', [])) if forecast else 0 for forecast in forecast_batch]
+        count, steps = len(forecast_batch), max(step_counts, default=0)
+        results = [[] for _ in forecast_batch]
+        if not steps:
+            return results
+
+        temps = np.full((count, steps), np.nan)
+        winds = np.full((count, steps), np.nan)
+        pops = np.full((count, steps), np.nan)
+        thunder = np.zeros((count, steps), dtype=bool)
+        for i, forecast in enumerate(forecast_batch):
+            for j, step in enumerate(forecast.get('list', []) if forecast else []):
+                temp = step.get('main', {}).get('temp')
+                if temp is not None:
+                    temps[i, j] = temp
+                wind_speed = step.get('wind', {}).get('speed')
+                if wind_speed is not None:
+                    winds[i, j] = wind_speed
+                pop = step.get('pop')
+                if pop is not None:
+                    pops[i, j] = pop
+                weather_conditions = step.get('weather', [{}])
+                thunder[i, j] = bool(weather_conditions) and weather_conditions[0].get('main') == 'Thunderstorm'
+
+        heat = temps > self.thresholds['temp_high']
+        conditions = [
+            heat,
+            ~heat & (temps < self.thresholds['temp_low']),
+            winds > self.thresholds['wind_speed'],
+            pops * 100 >= self.thresholds['rain_probability'],
+            thunder,
+        ]
+        # First step at which each condition appears; `steps` means never
+        first = np.stack([np.where(mask.any(axis=1), mask.argmax(axis=1), steps) for mask in conditions])
+        severe_first = first[FORECAST_SEVERE_CONDITIONS].min(axis=0)
+        # Streaming evaluation stops after the first severe step, so later conditions are dropped
+        included = (first < steps) & (first <= severe_first)
+
+        temp_unit, speed_unit = unit_labels(self.units)
+        for i in np.flatnonzero(included.any(axis=0)).tolist():
+            steps_list = forecast_batch[i]['list']
+            fired = sorted((int(first[k, i]), k) for k in np.flatnonzero(included[:, i]).tolist())
+            for j, k in fired:
+                step = steps_list[j]
+                if k == 0:
+                    alert = heat_alert(step['main']['temp'], self.thresholds['temp_high'], temp_unit)
+                elif k == 1:
+                    alert = freeze_alert(step['main']['temp'], self.thresholds['temp_low'], temp_unit)
+                elif k == 2:
+                    alert = wind_alert(step['wind']['speed'], self.thresholds['wind_speed'], speed_unit)
+                elif k == 3:
+                    alert = rain_likely_alert(step['pop'] * 100, self.thresholds['rain_probability'])
+                else:
+                    alert = thunderstorm_alert(step['weather'][0].get('description'))
+                results[i].append(forecast_alert(alert, step.get('dt', now), now))
+
+        return results
+
+
+def rain_likely_alert(pop_percent, threshold):
+    return {
+        'type': 'moderate',
+        'title': 'Rain Likely',
+        'message': f"Chance of precipitation is {pop_percent:g}%, which meets the rain probability threshold of {threshold}%."
+    }
+
+
+def forecast_alert(alert, step_dt, now):
+    """Turn a condition alert into a forecast alert saying when the condition is expected."""
+    hours = max(0, round((step_dt - now) / 3600))
+    return {
+        'type': alert['type'],
+        'title': f"{alert['title']} (Forecast)",
+        'message': f"Expected in {hours}h: {alert['message']}",
+        'expected_in': hours
+    }
+
+
+def forecast_step_alerts(step, thresholds, temp_unit, speed_unit):
+    """Return the condition alerts raised by a single 3-hour forecast step, in evaluation order."""
+    alerts = []
+
+    temp = step.get('main', {}).get('temp')
+    if temp is not None:
+        if temp > thresholds['temp_high']:
+            alerts.append(heat_alert(temp, thresholds['temp_high'], temp_unit))
+        elif temp < thresholds['temp_low']:
+            alerts.append(freeze_alert(temp, thresholds['temp_low'], temp_unit))
+
+    wind_speed = step.get('wind', {}).get('speed')
+    if wind_speed is not None and wind_speed > thresholds['wind_speed']:
+        alerts.append(wind_alert(wind_speed, thresholds['wind_speed'], speed_unit))
+
+    pop = step.get('pop')
+    if pop is not None and pop * 100 >= thresholds['rain_probability']:
+        alerts.append(rain_likely_alert(pop * 100, thresholds['rain_probability']))
+
+    weather_conditions = step.get('weather', [{}])
+    if weather_conditions and weather_conditions[0].get('main') == 'Thunderstorm':
+        alerts.append(thunderstorm_alert(weather_conditions[0].get('description')))
+
+    return alerts
+
+
+def forecast_alerts(forecast_data, thresholds, units, now):
+    """Stream over a city's forecast steps, stopping at the first step with a severe condition."""
+    if not forecast_data:
+        return []
+
+    temp_unit, speed_unit = unit_labels(units)
+    alerts = []
+    seen = set()
+    for step in forecast_data.get('list', []):
+        severe = False
+        for alert in forecast_step_alerts(step, thresholds, temp_unit, speed_unit):
+            # Only the earliest step at which each condition appears is reported
+            if alert['title'] in seen:
+                continue
+            seen.add(alert['title'])
+            alerts.append(forecast_alert(alert, step.get('dt', now), now))
+            severe = severe or alert['type'] == 'severe'
+        if severe:
+            break
+    return alerts
@@ -0,0 +1,409 @@
+import ast
+import logging
+import math
+import string
+
+from alert_engine import unit_labels
+
+logger = logging.getLogger("weather_alert_system.rules")
+
+# Config sections named "rule:<title>" each define one rule
+RULE_SECTION_PREFIX = 'rule:'
+
+SEVERITIES = ('severe', 'moderate', 'minor')
+
+# Short names for payload fields; other fields can be reached by path, e.g. main.grnd_level or rain['3h']
+FIELDS = {
+    'temp': ('main', 'temp'),
+    'feels_like': ('main', 'feels_like'),
+    'temp_min': ('main', 'temp_min'),
+    'temp_max': ('main', 'temp_max'),
+    'humidity': ('main', 'humidity'),
+    'pressure': ('main', 'pressure'),
+    'wind': ('wind', 'speed'),
+    'wind_gust': ('wind', 'gust'),
+    'wind_deg': ('wind', 'deg'),
+    'clouds': ('clouds', 'all'),
+    'visibility': ('visibility',),
+    'condition': ('weather', 0, 'main'),
+    'description': ('weather', 0, 'description'),
+    'rain_1h': ('rain', '1h'),
+    'snow_1h': ('snow', '1h'),
+}
+
+# Fields holding text; every other short name is a number
+TEXT_FIELDS = {'condition', 'description'}
+
+# Errors a matched rule's condition or message can raise on a valid payload (say a division by zero);
+# the rule then counts as not matched for that payload
+EVALUATION_ERRORS = (ArithmeticError, TypeError, KeyError, ValueError)
+
+_COMPARISONS = {
+    ast.Gt: '>', ast.GtE: '>=', ast.Lt: '<', ast.LtE: '<=', ast.Eq: '==', ast.NotEq: '!=',
+    ast.In: 'in', ast.NotIn: 'not in',
+}
+
+_ARITHMETIC = {ast.Add: '+', ast.Sub: '-', ast.Mult: '*', ast.Div: '/', ast.Mod: '%'}
+
+
+class RuleError(ValueError):
+    """A rule in the config could not be parsed."""
+
+
+def field_accessor(path):
+    """Return a function reading a payload field by path (keys and list indices), or None if it is missing."""
+    if len(path) == 1:
+        key, = path
+
+        def get(data):
+            try:
+                return data[key]
+            except (LookupError, TypeError):
+                return None
+    elif len(path) == 2:
+        first, second = path
+
+        def get(data):
+            try:
+                return data[first][second]
+            except (LookupError, TypeError):
+                return None
+    elif len(path) == 3:
+        first, second, third = path
+
+        def get(data):
+            try:
+                return data[first][second][third]
+            except (LookupError, TypeError):
+                return None
+    else:
+        def get(data):
+            try:
+                for key in path:
+                    data = data[key]
+                return data
+            except (LookupError, TypeError):
+                return None
+    return get
+
+
+def _literal(value):
+    """Return Python source for a constant, after checking it is one the rules allow."""
+    if isinstance(value, bool) or not isinstance(value, (int, float, str)):
+        raise RuleError(f"unsupported constant {value!r}")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise RuleError(f"unsupported constant {value!r}")
+    return repr(value)
+
+
+class _Compiler:
+    """Translates rule expressions into Python source over local variables holding payload fields.
+
+    Only the node types handled here are accepted, and user text only ever reaches the output as
+    repr() of a number or string, so the generated code can do nothing but read and compare fields.
+    Every field used by any rule gets one variable, read once per payload. A missing field is None,
+    and any comparison or arithmetic involving None is false (or None) rather than an error. Mixing
+    text and numbers, which could only fail or never match, is rejected when the rule is compiled.
+    """
+
+    def __init__(self, constants):
+        self.constants = constants
+        # Payload path -> local variable name
+        self.fields = {}
+        self._temporaries = 0
+
+    def compile(self, node):
+        method = getattr(self, f"_{type(node).__name__.lower()}", None)
+        if method is None:
+            raise RuleError(f"unsupported syntax '{ast.unparse(node)}'")
+        return method(node)
+
+    def nullable(self, node):
+        """Whether an expression can evaluate to None (because it reads a field that may be missing)."""
+        if isinstance(node, ast.Name):
+            return node.id in FIELDS
+        if isinstance(node, (ast.Attribute, ast.Subscript, ast.BoolOp)):
+            return True
+        if isinstance(node, ast.UnaryOp):
+            return not isinstance(node.op, ast.Not) and self.nullable(node.operand)
+        if isinstance(node, ast.BinOp):
+            return self.nullable(node.left) or self.nullable(node.right)
+        return False
+
+    def kind(self, node):
+        """Return 'text' or 'number' for an expression whose type is known from the rule alone, else None."""
+        if isinstance(node, ast.Constant):
+            return 'text' if isinstance(node.value, str) else 'number'
+        if isinstance(node, ast.Name):
+            if node.id in FIELDS:
+                return 'text' if node.id in TEXT_FIELDS else 'number'
+            if node.id in self.constants:
+                return 'text' if isinstance(self.constants[node.id], str) else 'number'
+            return None
+        if isinstance(node, ast.BinOp) or (isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub)):
+            return 'number'
+        return None
+
+    def _check_number(self, operand, node):
+        if self.kind(operand) == 'text':
+            raise RuleError(f"arithmetic on text in '{ast.unparse(node)}'")
+
+    def _field(self, path):
+        if path not in self.fields:
+            self.fields[path] = f"_f{len(self.fields)}"
+        return self.fields[path]
+
+    def _temporary(self):
+        self._temporaries += 1
+        return f"_t{self._temporaries}"
+
+    def _constant(self, node):
+        return _literal(node.value)
+
+    def _tuple(self, node):
+        items = []
+        for item in node.elts:
+            if not isinstance(item, ast.Constant):
+                raise RuleError(f"lists may only contain constants: '{ast.unparse(node)}'")
+            items.append(_literal(item.value))
+        return f"({', '.join(items)},)"
+
+    _list = _tuple
+    _set = _tuple
+
+    def _name(self, node):
+        if node.id in FIELDS:
+            return self._field(FIELDS[node.id])
+        if node.id in self.constants:
+            return _literal(self.constants[node.id])
+        raise RuleError(f"unknown field '{node.id}'")
+
+    def _path(self, node):
+        """Return the payload path of a chain like main.grnd_level, weather[0].main or rain['3h']."""
+        if isinstance(node, ast.Name):
+            return (node.id,)
+        if isinstance(node, ast.Attribute):
+            return self._path(node.value) + (node.attr,)
+        if (isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant)
+                and isinstance(node.slice.value, (int, str)) and not isinstance(node.slice.value, bool)):
+            return self._path(node.value) + (node.slice.value,)
+        raise RuleError(f"unsupported field path '{ast.unparse(node)}'")
+
+    def _attribute(self, node):
+        return self._field(self._path(node))
+
+    _subscript = _attribute
+
+    def _boolop(self, node):
+        joiner = ' and ' if isinstance(node.op, ast.And) else ' or '
+        return '(' + joiner.join(self.compile(value) for value in node.values) + ')'
+
+    def _unaryop(self, node):
+        operand = self.compile(node.operand)
+        if isinstance(node.op, ast.Not):
+            return f"(not {operand})"
+        if isinstance(node.op, ast.USub):
+            self._check_number(node.operand, node)
+            if not self.nullable(node.operand):
+                return f"(-{operand})"
+            value, check = self._bind(operand)
+            return f"(None if {check} else -{value})"
+        raise RuleError(f"unsupported operator in '{ast.unparse(node)}'")
+
+    def _binop(self, node):
+        op = _ARITHMETIC.get(type(node.op))
+        if op is None:
+            raise RuleError(f"unsupported operator in '{ast.unparse(node)}'")
+        self._check_number(node.left, node)
+        self._check_number(node.right, node)
+        left, right = self.compile(node.left), self.compile(node.right)
+        checks = []
+        if self.nullable(node.left):
+            left, check = self._bind(left)
+            checks.append(check)
+        if self.nullable(node.right):
+            right, check = self._bind(right)
+            checks.append(check)
+        if not checks:
+            return f"({left} {op} {right})"
+        return f"(None if {' or '.join(checks)} else {left} {op} {right})"
+
+    def _compare(self, node):
+        tests = []
+        operands = [node.left] + node.comparators
+        sources = [self.compile(operand) for operand in operands]
+        for i, op_node in enumerate(node.ops):
+            op = _COMPARISONS.get(type(op_node))
+            if op is None:
+                raise RuleError(f"unsupported comparison in '{ast.unparse(node)}'")
+            self._check_comparison(operands[i], op_node, operands[i + 1], node)
+            left, right = sources[i], sources[i + 1]
+            guards = []
+            for j, source in ((i, left), (i + 1, right)):
+                if not self.nullable(operands[j]):
+                    continue
+                if source.isidentifier():
+                    guards.append(f"{source} is not None")
+                else:
+                    # Evaluate a computed operand once and keep it for the comparison
+                    bound = self._temporary()
+                    guards.append(f"({bound} := {source}) is not None")
+                    sources[j] = source = bound
+                if j == i:
+                    left = source
+                else:
+                    right = source
+            tests.append(' and '.join(guards + [f"{left} {op} {right}"]))
+        return '(' + ' and '.join(tests) + ')'
+
+    def _check_comparison(self, left, op, right, node):
+        """Reject comparing text with a number, which raises (or for == is never true) on every payload."""
+        left_kind = self.kind(left)
+        if isinstance(op, (ast.In, ast.NotIn)):
+            if isinstance(right, (ast.Tuple, ast.List, ast.Set)):
+                right_kinds = {self.kind(item) for item in right.elts}
+            else:
+                # Membership in a value is only meaningful for text: 'Heavy' in description
+                right_kinds = {self.kind(right)}
+                if right_kinds == {'number'}:
+                    raise RuleError(f"'in' needs text or a list on the right in '{ast.unparse(node)}'")
+        else:
+            right_kinds = {self.kind(right)}
+        if left_kind and any(kind and kind != left_kind for kind in right_kinds):
+            raise RuleError(f"compares text with a number in '{ast.unparse(node)}'")
+
+    def _bind(self, source):
+        """Return (name, None check) for an operand, evaluating computed operands only once."""
+        if source.isidentifier():
+            return source, f"{source} is None"
+        bound = self._temporary()
+        return bound, f"({bound} := {source}) is None"
+
+
+class AlertRule:
+    """One configured alert: a condition plus the severity, title and message it raises."""
+
+    def __init__(self, title, condition, severity='moderate', message='', thresholds=None, units='imperial'):
+        """Parse and check condition; thresholds (temp_high, ...) may be used by name in the rule."""
+        if severity not in SEVERITIES:
+            raise RuleError(f"unknown severity '{severity}'. Choose from: {', '.join(SEVERITIES)}")
+        self.title = title
+        self.severity = severity
+        self.condition = condition
+        temp_unit, speed_unit = unit_labels(units)
+        self.constants = dict(thresholds or {}, temp_unit=temp_unit, speed_unit=speed_unit)
+
+        try:
+            self.tree = ast.parse(condition, mode='eval').body
+        except SyntaxError as e:
+            raise RuleError(f"invalid expression '{condition}': {e.msg}") from None
+        # Compile once here so errors are reported against this rule
+        _Compiler(self.constants).compile(self.tree)
+
+        self.message = message or f"Rule matched: {condition}"
+        self._template_constants = {}
+        self._template_fields = []
+        for _, name, _, _ in string.Formatter().parse(self.message):
+            if name is None:
+                continue
+            if name in FIELDS:
+                self._template_fields.append((name, field_accessor(FIELDS[name])))
+            elif name in self.constants:
+                self._template_constants[name] = self.constants[name]
+            else:
+                raise RuleError(f"unknown field '{{{name}}}' in message")
+
+    def alert(self, data):
+        """Build the alert for a payload the rule matched."""
+        values = dict(self._template_constants)
+        for name, get in self._template_fields:
+            values[name] = get(data)
+        return {'type': self.severity, 'title': self.title, 'message': self.message.format_map(values)}
+
+
+class RuleSet:
+    """The configured rules, compiled together into a single function evaluated once per payload."""
+
+    def __init__(self, rules=()):
+        self.rules = list(rules)
+        self.source = self._generate()
+        namespace = {f"_alert{i}": rule.alert for i, rule in enumerate(self.rules)}
+        namespace.update(_errors=EVALUATION_ERRORS, _failed=self._failed)
+        # Rules that have failed on some payload; each is logged only the first time
+        self._failed_rules = set()
+        exec(compile(self.source, '<alert rules>', 'exec'), namespace)
+        self.evaluate = namespace['evaluate']
+        self.evaluate.__doc__ = "Return the alerts of every rule matching a weather payload, in config order."
+
+    def _failed(self, index, error):
+        if index in self._failed_rules:
+            return
+        self._failed_rules.add(index)
+        rule = self.rules[index]
+        logger.warning("Alert rule '%s' could not be evaluated (%s: %s); it does not fire for such observations",
+                       rule.title, type(error).__name__, error)
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def __len__(self):
+        return len(self.rules)
+
+    def _generate(self):
+        compiler = _Compiler({})
+        conditions = []
+        for rule in self.rules:
+            compiler.constants = rule.constants
+            conditions.append(compiler.compile(rule.tree))
+
+        lines = ['def evaluate(data):']
+        for path, name in compiler.fields.items():
+            lookup = ''.join(f"[{key!r}]" for key in path)
+            lines += [
+                '    try:',
+                f"        {name} = data{lookup}",
+                '    except (LookupError, TypeError):',
+                f"        {name} = None",
+            ]
+        lines.append('    alerts = []')
+        for i, condition in enumerate(conditions):
+            # Each rule is guarded on its own, so one failing on a payload does not stop the others
+            lines += [
+                '    try:',
+                f"        if {condition}:",
+                f"            alerts.append(_alert{i}(data))",
+                '    except _errors as e:',
+                f"        _failed({i}, e)",
+            ]
+        lines.append('    return alerts')
+        return '\n'.join(lines) + '\n'
+
+
+def load_rules(config, thresholds, units):
+    """Compile every [rule:<title>] section of a config into a RuleSet; raises RuleError naming the bad rule."""
+    rules = []
+    for section in config.sections():
+        if not section.startswith(RULE_SECTION_PREFIX):
+            continue
+        title = section[len(RULE_SECTION_PREFIX):].strip()
+        try:
+            rules.append(AlertRule(
+                title,
+                config.get(section, 'when'),
+                severity=config.get(section, 'severity', fallback='moderate'),
+                # Messages are read raw so a literal % needs no escaping
+                message=config.get(section, 'message', raw=True, fallback=''),
+                thresholds=thresholds,
+                units=units
+            ))
+        except Exception as e:
+            raise RuleError(f"[{section}] {e}") from None
+    return RuleSet(rules)
+
+
+def rule_sections(config):
+    """Return the raw settings of every rule section, for spotting rule changes on reload."""
+    return {
+        section: dict(config.items(section, raw=True))
+        for section in config.sections() if section.startswith(RULE_SECTION_PREFIX)
+    }
@@ -0,0 +1,116 @@
+import logging
+import sqlite3
+import time
+
+logger = logging.getLogger("weather_alert_system.state")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alert_state (
+    location TEXT NOT NULL,
+    title TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    type TEXT NOT NULL,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    last_sent REAL,
+    active INTEGER NOT NULL DEFAULT 1,
+    PRIMARY KEY (location, title)
+) WITHOUT ROWID
+"""
+
+
+class AlertStateStore:
+    """Persistent record of active alerts, used to suppress repeats and announce when alerts end."""
+
+    def __init__(self, path='alert_state.db', cooldown=21600, all_clear=True):
+        """Open (or create) the SQLite state database at path."""
+        self.path = path
+        self.cooldown = cooldown
+        self.all_clear = all_clear
+        self.stats = {'sent': 0, 'suppressed': 0, 'cleared': 0}
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(SCHEMA)
+        self._conn.commit()
+
+    def filter_alerts(self, location, alerts, kind='current', now=None, complete=True):
+        """Record this evaluation's alerts and return the ones that should be sent.
+
+        New alerts, and alerts whose cooldown has passed since they were last sent, are returned.
+        Alerts of the same kind that were active before but are missing now are closed and,
+        if enabled, reported with an "All Clear" notice. Pass complete=False when the evaluation
+        stopped before checking every condition; missing alerts then stay active.
+        """
+        now = time.time() if now is None else now
+        cursor = self._conn.cursor()
+        # The primary key makes this a prefix lookup on (location, title)
+        previous = {
+            title: (active, last_sent)
+            for title, active, last_sent in cursor.execute(
+                "SELECT title, active, last_sent FROM alert_state WHERE location = ? AND kind = ?",
+                (location, kind)
+            )
+        }
+
+        to_send = []
+        current_titles = set()
+        for alert in alerts:
+            title = alert['title']
+            current_titles.add(title)
+            active, last_sent = previous.get(title, (0, None))
+
+            if active and last_sent is not None and now - last_sent < self.cooldown:
+                self.stats['suppressed'] += 1
+                cursor.execute(
+                    "UPDATE alert_state SET last_seen = ?, type = ? WHERE location = ? AND title = ?",
+                    (now, alert['type'], location, title)
+                )
+                continue
+
+            to_send.append(alert)
+            self.stats['sent'] += 1
+            if active:
+                cursor.execute(
+                    "UPDATE alert_state SET last_seen = ?, last_sent = ?, type = ? WHERE location = ? AND title = ?",
+                    (now, now, alert['type'], location, title)
+                )
+            else:
+                cursor.execute(
+                    "INSERT OR REPLACE INTO alert_state "
+                    "(location, title, kind, type, first_seen, last_seen, last_sent, active) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, 1)",
+                    (location, title, kind, alert['type'], now, now, now)
+                )
+
+        for title, (active, _) in previous.items():
+            if not complete or not active or title in current_titles:
+                continue
+            self.stats['cleared'] += 1
+            cursor.execute(
+                "UPDATE alert_state SET active = 0 WHERE location = ? AND title = ?",
+                (location, title)
+            )
+            if self.all_clear:
+                to_send.append({
+                    'type': 'info',
+                    'title': f"All Clear: {title}",
+                    'message': f"The {title} for {location} has ended."
+                })
+
+        return to_send
+
+    def forget(self, location):
+        """Remove all recorded alerts for a location."""
+        self._conn.execute("DELETE FROM alert_state WHERE location = ?", (location,))
+
+    def commit(self):
+        """Persist the changes recorded during this cycle in one transaction."""
+        self._conn.commit()
+        logger.info("Alert state: sent=%s suppressed=%s cleared=%s",
+                    self.stats['sent'], self.stats['suppressed'], self.stats['cleared'])
+
+    def close(self):
+        """Commit pending changes and close the database."""
+        self._conn.commit()
+        self._conn.close()
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Weather Alert System Benchmark
+
+Runs full check cycles of the Weather Alert System against the local mock OpenWeatherMap
+server and records cycle time, memory and request throughput at several location counts.
+Usage: python benchmark.py [--sizes 10,1000,10000] [--latency 50] [--output benchmark_results.json]
+Results are written as JSON so runs from different versions can be diffed.
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/__stats") as response:
+        return json.load(response)
+
+
+def wait_for_server(base_url, timeout=10):
+    deadline = time.time() + timeout
+    while True:
+        try:
+            return server_stats(base_url)
+        except OSError:
+            if time.time() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+def write_config(path, base_url, size, args):
+    """Write a config that points at the mock server and disables side effects."""
+    cities = [f"City {i:05d}" for i in range(size)]
+    with open(path, 'w') as f:
+        f.write(f"""[api]
+key = benchmark
+base_url = {base_url}
+
+[preferences]
+output_format = none
+
+[locations]
+cities = {json.dumps(cities)}
+
+[alerts]
+vectorized = {str(args.vectorized).lower()}
+
+[logging]
+path =
+level = WARNING
+
+[network]
+max_concurrency = {args.concurrency}
+rate_limit = 0
+max_retries = 1
+backoff_base = 0.05
+
+[cache]
+enabled = false
+
+[bulk]
+enabled = {str(args.bulk).lower()}
+id_cache = {path}.ids.json
+
+[state]
+enabled = false
+
+[email]
+enabled = false
+""")
+
+
+def run_one(args):
+    """Run cycles for one location count in this process and print the result as JSON."""
+    sys.path.insert(0, HERE)
+    import weather_alert_system
+
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = os.path.join(workdir, 'benchmark.ini')
+        write_config(config_path, args.base_url, args.run_one, args)
+        system = weather_alert_system.WeatherAlertSystem(config_file=config_path)
+
+        cycles = []
+        with open(os.devnull, 'w') as devnull:
+            for _ in range(args.cycles):
+                before = server_stats(args.base_url)['requests']
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(devnull):
+                    results = system.check_locations()
+                elapsed = time.perf_counter() - start
+                requests_made = server_stats(args.base_url)['requests'] - before
+                cycles.append({
+                    'cycle_seconds': round(elapsed, 4),
+                    'requests': requests_made,
+                    'requests_per_second': round(requests_made / elapsed, 1) if elapsed else None,
+                    'locations_per_second': round(args.run_one / elapsed, 1) if elapsed else None,
+                    'locations_with_data': sum(1 for weather_data, _ in results.values() if weather_data),
+                })
+        system.close()
+
+    peak_rss_mb = None
+    if resource is not None:
+        # ru_maxrss is reported in kilobytes on Linux and bytes on macOS
+        scale = 1024 * 1024 if sys.platform == 'darwin' else 1024
+        peak_rss_mb = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale, 1)
+
+    print(json.dumps({'locations': args.run_one, 'peak_rss_mb': peak_rss_mb, 'cycles': cycles}))
+
+
+def git_version():
+    try:
+        return subprocess.check_output(
+            ['git', 'describe', '--always', '--dirty'], cwd=HERE, stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Weather Alert System against a mock API")
+    parser.add_argument('--sizes', default='10,1000,10000', help='Comma-separated location counts to benchmark')
+    parser.add_argument('--cycles', type=int, default=2, help='Check cycles to run per location count')
+    parser.add_argument('--latency', type=float, default=50, help='Mock server latency in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of mock responses that fail with 503')
+    parser.add_argument('--concurrency', type=int, default=32, help='max_concurrency for the system under test')
+    parser.add_argument('--bulk', action='store_true', help='Use the group endpoint')
+    parser.add_argument('--vectorized', action='store_true', help='Use vectorized alert evaluation')
+    parser.add_argument('--label', help='Label stored with the results (defaults to git describe)')
+    parser.add_argument('-o', '--output', default='benchmark_results.json', help='Where to write the JSON results')
+    parser.add_argument('--run-one', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--base-url', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_one is not None:
+        run_one(args)
+        return 0
+
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}/data/2.5"
+    server = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, 'mock_owm_server.py'), '--port', str(port),
+         '--latency', str(args.latency), '--error-rate', str(args.error_rate), '--seed', '1'],
+        stdout=subprocess.DEVNULL
+    )
+    results = []
+    try:
+        wait_for_server(base_url)
+        for size in [int(size) for size in args.sizes.split(',') if size.strip()]:
+            print(f"Benchmarking {size} locations...", flush=True)
+            # Each size runs in a fresh interpreter so peak memory is measured per size
+            command = [
+                sys.executable, os.path.abspath(__file__), '--run-one', str(size), '--base-url', base_url,
+                '--cycles', str(args.cycles), '--concurrency', str(args.concurrency)
+            ]
+            if args.bulk:
+                command.append('--bulk')
+            if args.vectorized:
+                command.append('--vectorized')
+            output = subprocess.check_output(command, cwd=tempfile.gettempdir(), text=True)
+            result = json.loads(output.strip().splitlines()[-1])
+            results.append(result)
+            for i, cycle in enumerate(result['cycles'], 1):
+                print(f"  cycle {i}: {cycle['cycle_seconds']:.2f}s, {cycle['requests']} requests, "
+                      f"{cycle['requests_per_second']} req/s, peak RSS {result['peak_rss_mb']} MB")
+    finally:
+        server.terminate()
+        server.wait()
+
+    report = {
+        'label': args.label or git_version(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'settings': {
+            'latency_ms': args.latency,
+            'error_rate': args.error_rate,
+            'concurrency': args.concurrency,
+            'bulk': args.bulk,
+            'vectorized': args.vectorized,
+            'cycles': args.cycles,
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write('\n')
+    print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,56 @@
+import gzip
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger("weather_alert_system.capture")
+
+
+class CaptureWriter:
+    """Appends every API response received during a live run to a gzip-compressed JSON-lines file."""
+
+    def __init__(self, path):
+        """Open path for appending; each run adds a new gzip member, which readers see as one stream."""
+        self.path = path
+        self.records = 0
+        self._file = gzip.open(path, 'at', encoding='utf-8')
+        self._lock = threading.Lock()
+        logger.info("Recording API responses to %s", path)
+
+    def _write(self, record):
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            self._file.write(line)
+
+    def record(self, endpoint, location, data):
+        """Record one response for a location."""
+        self._write({'t': time.time(), 'endpoint': endpoint, 'location': location, 'data': data})
+        self.records += 1
+
+    def end_cycle(self):
+        """Mark the end of a check cycle so replays run the same end-of-cycle work."""
+        self._write({'t': time.time(), 'cycle_end': True})
+        with self._lock:
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+        logger.info("Recorded %s API responses to %s", self.records, self.path)
+
+
+def read_capture(path):
+    """Yield the records of a capture file in the order they were written."""
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        try:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A run killed mid-write can leave a truncated final line
+                    logger.warning("Skipping unreadable capture line %s in %s", line_number, path)
+        except EOFError:
+            logger.warning("Capture %s ends with an incomplete gzip block; stopping there", path)
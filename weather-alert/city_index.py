@@ -0,0 +1,65 @@
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger("weather_alert_system.city_index")
+
+
+class CityIndex:
+    """Persistent mapping of free-text location names to OpenWeatherMap city IDs."""
+
+    def __init__(self, path='city_ids.json'):
+        """Load the index from path if it exists."""
+        self.path = path
+        self._ids = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self._ids = {name: int(city_id) for name, city_id in json.load(f).items()}
+            logger.info("Loaded %s city IDs from %s", len(self._ids), self.path)
+        except (OSError, ValueError, TypeError) as e:
+            logger.warning("Ignoring unreadable city ID index %s: %s", self.path, e)
+            self._ids = {}
+
+    def get(self, location):
+        """Return the city ID for a location, or None if it has not been resolved yet."""
+        return self._ids.get(location)
+
+    def record(self, location, weather_data):
+        """Remember the city ID from a /weather response for this location."""
+        city_id = (weather_data or {}).get('id')
+        if not city_id:
+            return
+        with self._lock:
+            if self._ids.get(location) != city_id:
+                self._ids[location] = int(city_id)
+                self._dirty = True
+
+    def discard(self, location):
+        """Forget a location's city ID."""
+        with self._lock:
+            if self._ids.pop(location, None) is not None:
+                self._dirty = True
+
+    def save(self):
+        """Write the index to disk if any IDs were added since the last save."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            ids = dict(self._ids)
+            self._dirty = False
+
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(ids, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error("Error saving city ID index to %s: %s", self.path, e)
@@ -0,0 +1,174 @@
+import json
+import logging
+import os
+import pickle
+from configparser import ConfigParser, RawConfigParser
+
+logger = logging.getLogger("weather_alert_system.config")
+
+# Bump when the pickled layout changes so old snapshots are rebuilt instead of misread
+SNAPSHOT_VERSION = 2
+
+# JSON-valued settings decoded before a snapshot is written, so loading one skips json.loads too
+JSON_SETTINGS = [
+    ('locations', 'cities'),
+    ('locations', 'points'),
+    ('logging', 'debug_locations'),
+    ('email', 'recipients'),
+]
+
+# Credentials are never written to the snapshot; loading one reads them from the config file itself
+SECRET_SETTINGS = [
+    ('api', 'key'),
+    ('email', 'username'),
+    ('email', 'password'),
+    ('webhook', 'url'),
+]
+
+
+class WeatherConfig(ConfigParser):
+    """ConfigParser that remembers its decoded JSON settings, so a snapshot carries them ready to use."""
+
+    def __init__(self):
+        super().__init__()
+        # Raw setting text -> decoded value
+        self.decoded = {}
+
+    def getjson(self, section, option, fallback):
+        """Return a JSON-valued setting decoded; each distinct raw value is decoded only once."""
+        raw = self.get(section, option, fallback=fallback)
+        if raw not in self.decoded:
+            self.decoded[raw] = json.loads(raw)
+        return self.decoded[raw]
+
+
+def snapshot_path(config_file):
+    """Where the snapshot of a config file is kept: next to it, as <name>.snapshot."""
+    return config_file + '.snapshot'
+
+
+def _snapshot_key(config_file):
+    stat = os.stat(config_file)
+    return SNAPSHOT_VERSION, os.path.abspath(config_file), stat.st_mtime_ns, stat.st_size
+
+
+def _read_secrets(config_file, wanted):
+    """Read just the wanted (section, option) values from a config file.
+
+    Returns None when a value is written in a way only a full parse handles (continuation lines,
+    interpolation), so the caller falls back to parsing the file.
+    """
+    wanted = set(wanted)
+    found = {}
+    section = previous = None
+    with open(config_file) as f:
+        for line in f:
+            stripped = line.strip()
+            if not stripped or stripped[0] in '#;':
+                continue
+            if line[0].isspace():
+                if previous is not None:
+                    return None
+                continue
+            previous = None
+            header = ConfigParser.SECTCRE.match(stripped)
+            if header:
+                section = header.group('header')
+                continue
+            option = ConfigParser.OPTCRE.match(stripped)
+            if option is None:
+                continue
+            setting = (section, option.group('option').strip().lower())
+            if setting in wanted:
+                value = option.group('value').strip()
+                if '%' in value:
+                    return None
+                found[setting] = previous = value
+    return found if set(found) == wanted else None
+
+
+def _private(f):
+    """Whether an open snapshot belongs to this user and no one else can write it."""
+    stat = os.fstat(f.fileno())
+    if hasattr(os, 'getuid') and stat.st_uid != os.getuid():
+        return False
+    return not stat.st_mode & 0o022
+
+
+def load_snapshot(config_file):
+    """Return the parsed config saved for config_file, or None if there is none or the file has changed since.
+
+    A snapshot another user owns or can write is ignored, since unpickling it could run their code.
+    """
+    path = snapshot_path(config_file)
+    try:
+        key = _snapshot_key(config_file)
+        with open(path, 'rb') as f:
+            if not _private(f):
+                logger.warning("Ignoring config snapshot %s: it is writable by other users", path)
+                return None
+            snapshot = pickle.load(f)
+    except (OSError, pickle.PickleError, EOFError, AttributeError, ImportError, TypeError, ValueError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get('key') != key:
+        return None
+
+    config = snapshot['config']
+    try:
+        secrets = _read_secrets(config_file, snapshot['secrets']) if snapshot['secrets'] else {}
+    except (OSError, UnicodeDecodeError):
+        return None
+    if secrets is None:
+        return None
+    for (section, option), value in secrets.items():
+        RawConfigParser.set(config, section, option, value)
+    return config
+
+
+def save_snapshot(config, config_file):
+    """Save a freshly parsed config, with its JSON settings decoded, for the next run to reuse."""
+    for section, option in JSON_SETTINGS:
+        if config.has_option(section, option):
+            try:
+                config.getjson(section, option, fallback=None)
+            except ValueError:
+                # Left for the code reading the setting to report
+                pass
+    if any(option in config.defaults() for _, option in SECRET_SETTINGS):
+        # A credential in [DEFAULT] would show up in every section; not worth snapshotting
+        return
+
+    # The credentials are taken out while pickling and put back for the caller
+    secrets = {}
+    for section, option in SECRET_SETTINGS:
+        if config.has_option(section, option):
+            secrets[(section, option)] = config.get(section, option, raw=True)
+            config.remove_option(section, option)
+
+    path = snapshot_path(config_file)
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        # Created private: even without credentials the snapshot is a pickle loaded at startup
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, 'wb') as f:
+            pickle.dump({'key': _snapshot_key(config_file), 'config': config, 'secrets': list(secrets)},
+                        f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+    except OSError as e:
+        logger.debug("Could not write config snapshot %s: %s", path, e)
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+    finally:
+        for (section, option), value in secrets.items():
+            RawConfigParser.set(config, section, option, value)
+
+
+def remove_snapshot(config_file):
+    try:
+        os.remove(snapshot_path(config_file))
+    except OSError:
+        pass
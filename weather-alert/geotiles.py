@@ -0,0 +1,91 @@
+_BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+
+def geohash_encode(lat, lon, precision=5):
+    """Return the geohash cell of the given precision (characters) containing a point."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        # Bits alternate between longitude and latitude, starting with longitude
+        interval, coordinate = (lon_range, lon) if even else (lat_range, lat)
+        mid = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= mid:
+            value |= 1
+            interval[0] = mid
+        else:
+            interval[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(_BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+def geohash_bounds(geohash):
+    """Return (lat_min, lat_max, lon_min, lon_max) of a geohash cell."""
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        value = _BASE32.index(char)
+        for shift in range(4, -1, -1):
+            interval = lon_range if even else lat_range
+            mid = (interval[0] + interval[1]) / 2
+            if value >> shift & 1:
+                interval[0] = mid
+            else:
+                interval[1] = mid
+            even = not even
+    return lat_range[0], lat_range[1], lon_range[0], lon_range[1]
+
+
+def geohash_center(geohash):
+    """Return the (lat, lon) centre of a geohash cell."""
+    lat_min, lat_max, lon_min, lon_max = geohash_bounds(geohash)
+    return (lat_min + lat_max) / 2, (lon_min + lon_max) / 2
+
+
+def parse_points(points):
+    """Validate a {name: [lat, lon]} mapping from the config and return {name: (lat, lon)}."""
+    if not isinstance(points, dict):
+        raise ValueError("[locations] points must be a JSON object of name: [lat, lon]")
+    parsed = {}
+    for name, coordinates in points.items():
+        lat, lon = (float(value) for value in coordinates)
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f"Coordinates for {name} are out of range: {lat}, {lon}")
+        parsed[name] = (lat, lon)
+    return parsed
+
+
+class TileIndex:
+    """Groups coordinate locations into geohash tiles so each tile needs only one fetch."""
+
+    def __init__(self, points, precision=5):
+        """points maps a location name to (lat, lon); precision is the geohash length of a tile."""
+        self.precision = precision
+        self._tiles = {name: geohash_encode(lat, lon, precision) for name, (lat, lon) in points.items()}
+
+    def __contains__(self, location):
+        return location in self._tiles
+
+    def tile_for(self, location):
+        """Return the tile of a coordinate location, or None for a named city."""
+        return self._tiles.get(location)
+
+    def group(self, locations):
+        """Split coordinate locations into {tile: [locations]}."""
+        tiles = {}
+        for location in locations:
+            tiles.setdefault(self._tiles[location], []).append(location)
+        return tiles
+
+    def tile_count(self):
+        return len(set(self._tiles.values()))
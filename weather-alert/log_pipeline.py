@@ -0,0 +1,116 @@
+import atexit
+import collections
+import logging
+import logging.handlers
+import queue
+import sys
+
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_queue_handler = None
+_listener = None
+_early_handler = None
+
+
+class _EarlyBuffer(logging.Handler):
+    """Holds the records logged before configure_logging() runs, such as those from loading the config."""
+
+    def __init__(self, capacity=1000):
+        super().__init__()
+        self.records = collections.deque(maxlen=capacity)
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def buffer_early_logging():
+    """Keep records logged until configure_logging() runs, which then writes them through the configured handlers.
+
+    Does nothing when the root logger already has handlers (a shard worker forwarding to its coordinator).
+    If logging is never configured, the held records are written to standard error at exit.
+    """
+    global _early_handler
+    root = logging.getLogger()
+    if _early_handler is not None or root.handlers:
+        return
+    _early_handler = _EarlyBuffer()
+    root.addHandler(_early_handler)
+    # The configured level is not known yet; records below it are dropped when they are written out
+    root.setLevel(logging.DEBUG)
+
+
+def _take_early_records():
+    global _early_handler
+    if _early_handler is None:
+        return []
+    logging.getLogger().removeHandler(_early_handler)
+    records, _early_handler = list(_early_handler.records), None
+    return records
+
+
+def configure_logging(path='weather_alerts.log', level='INFO', max_bytes=10485760, backup_count=5,
+                      rotate_when='', console=True):
+    """Route all log records through a queue drained by a background thread that does the file and console I/O.
+
+    The log file rotates at max_bytes, or on a schedule when rotate_when is set (e.g. 'midnight');
+    an empty path disables the file. Calling this again replaces the previous configuration.
+    """
+    global _queue_handler, _listener
+    early_records = _take_early_records()
+    stop_logging()
+
+    handlers = []
+    if path:
+        if rotate_when:
+            handlers.append(logging.handlers.TimedRotatingFileHandler(
+                path, when=rotate_when, backupCount=backup_count, encoding='utf-8'
+            ))
+        elif max_bytes:
+            handlers.append(logging.handlers.RotatingFileHandler(
+                path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8'
+            ))
+        else:
+            handlers.append(logging.FileHandler(path, encoding='utf-8'))
+    if console:
+        handlers.append(logging.StreamHandler())
+    formatter = logging.Formatter(LOG_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    # Callers only pay for building the record and queueing it; file and console writes happen on the listener thread
+    log_queue = queue.SimpleQueue()
+    _queue_handler = logging.handlers.QueueHandler(log_queue)
+    root = logging.getLogger()
+    root.addHandler(_queue_handler)
+    root.setLevel(level.upper() if isinstance(level, str) else level)
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    for record in early_records:
+        if record.levelno >= root.level:
+            _queue_handler.handle(record)
+    return _listener
+
+
+def stop_logging():
+    """Write out any queued records and stop the listener thread."""
+    global _queue_handler, _listener
+    early_records = _take_early_records()
+    if early_records:
+        # Logging was never configured (the config could not be loaded, say): these would otherwise be lost
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        for record in early_records:
+            if record.levelno >= logging.INFO:
+                handler.handle(record)
+        handler.flush()
+    if _queue_handler is not None:
+        logging.getLogger().removeHandler(_queue_handler)
+        _queue_handler = None
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,146 @@
+import logging
+import smtplib
+import time
+from datetime import datetime
+from email.message import EmailMessage
+
+from notifications import NotificationSink
+
+logger = logging.getLogger("weather_alert_system.mail")
+
+
+class EmailSink(NotificationSink):
+    """Sends alert emails in batches over one SMTP connection, reused until the end of each cycle."""
+
+    def __init__(self, smtp_server, smtp_port, sender, recipients, username='', password='',
+                 use_tls=True, digest=False, timeout=30, **options):
+        """Create the sink; call start() before submitting alerts."""
+        super().__init__('email', **options)
+        self.smtp_server = smtp_server
+        self.smtp_port = smtp_port
+        self.sender = sender
+        self.recipients = recipients
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.digest = digest
+        self.timeout = timeout
+        self.stats['connections'] = 0
+        self._digest_entries = []
+        self._server = None
+
+    def submit(self, location, alerts):
+        """Queue alerts for a location; in digest mode they are held until end_cycle()."""
+        if self.digest:
+            if alerts:
+                self._digest_entries.append((location, alerts))
+            return
+        super().submit(location, alerts)
+
+    def end_cycle(self):
+        """Queue this cycle's digest, then flush the batch and close the connection once it is sent."""
+        if self._digest_entries:
+            entries, self._digest_entries = self._digest_entries, []
+            self._enqueue({'time': time.time(), 'digest': entries})
+        super().end_cycle()
+
+    def stop(self, timeout=None):
+        """Send everything still queued, including a pending digest, then stop the worker thread."""
+        if self._digest_entries:
+            self.end_cycle()
+        super().stop(timeout)
+
+    def deliver(self, batch):
+        """Send every email in the batch, skipping those already sent by an earlier attempt."""
+        for notification in batch:
+            if 'unsent' not in notification:
+                notification['unsent'] = self._build(notification)
+            unsent = notification['unsent']
+            while unsent:
+                self._send(unsent[0])
+                unsent.pop(0)
+
+    def close(self):
+        self._disconnect()
+
+    def cycle_done(self):
+        self._disconnect()
+
+    def _build(self, notification):
+        if 'digest' in notification:
+            return [self.build_digest(notification['digest'], recipient) for recipient in self.recipients]
+        return [self.build_message(notification['location'], notification['alerts'])]
+
+    def build_message(self, location, alerts):
+        """Build the alert email for a single location."""
+        msg = EmailMessage()
+        msg['Subject'] = f"Weather Alert: {location}"
+        msg['From'] = self.sender
+        msg['To'] = ', '.join(self.recipients)
+
+        content = [f"Weather Alerts for {location} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
+
+        for alert in alerts:
+            content.append(f"{alert['title']} ({alert['type'].upper()})")
+            content.append(f"{alert['message']}")
+            content.append("")
+
+        msg.set_content('\n'.join(content))
+        return msg
+
+    def build_digest(self, entries, recipient):
+        """Build one email rolling up every location's alerts for a recipient."""
+        msg = EmailMessage()
+        msg['Subject'] = f"Weather Alerts: {len(entries)} location{'s' if len(entries) != 1 else ''}"
+        msg['From'] = self.sender
+        msg['To'] = recipient
+
+        content = [f"Weather Alert Digest - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
+
+        for location, alerts in entries:
+            content.append(f"== {location} ==")
+            for alert in alerts:
+                content.append(f"{alert['title']} ({alert['type'].upper()})")
+                content.append(f"{alert['message']}")
+            content.append("")
+
+        msg.set_content('\n'.join(content))
+        return msg
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=self.timeout)
+        try:
+            if self.use_tls:
+                server.starttls()
+            if self.username:
+                server.login(self.username, self.password)
+        except Exception:
+            server.close()
+            raise
+        self.stats['connections'] += 1
+        return server
+
+    def _disconnect(self):
+        if self._server is None:
+            return
+        try:
+            self._server.quit()
+        except (smtplib.SMTPException, OSError):
+            self._server.close()
+        self._server = None
+
+    def _send(self, msg):
+        """Send a message over the open connection; a failed connection is closed so a retry reopens it."""
+        try:
+            if self._server is None:
+                self._server = self._connect()
+            self._server.send_message(msg)
+        except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, OSError):
+            if self._server is not None:
+                self._server.close()
+                self._server = None
+            raise
+        except Exception:
+            self._disconnect()
+            raise
+        logger.info("Alert email sent: %s", msg['Subject'])
@@ -0,0 +1,207 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("weather_alert_system.metrics")
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=None):
+    pairs = list(key) + (extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.total += value
+        self.count += 1
+
+    def cumulative(self):
+        running = 0
+        for bound, count in zip(self.buckets, self.counts):
+            running += count
+            yield bound, running
+
+
+class Metrics:
+    """Thread-safe registry of counters, gauges and histograms for the alert daemon."""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._collectors = []
+        self._merged_gauges = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        """Increase a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Record a value (normally seconds) in a histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name, **labels):
+        """Time the enclosed block into a histogram."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def add_collector(self, collect):
+        """Register a callable returning a list of (name, labels_dict, value) gauges read at export time."""
+        self._collectors.append(collect)
+
+    def _gauges(self):
+        gauges = {}
+        for collect in self._collectors:
+            for name, labels, value in collect():
+                gauges[(name, _label_key(labels))] = value
+        # Gauges merged from other processes take precedence over this process's idle components
+        gauges.update(self._merged_gauges)
+        return gauges
+
+    def state(self):
+        """Return raw counter, histogram and gauge values in a picklable form for merging elsewhere."""
+        with self._lock:
+            state = {
+                'counters': dict(self._counters),
+                'histograms': {
+                    key: (list(histogram.counts), histogram.total, histogram.count)
+                    for key, histogram in self._histograms.items()
+                },
+            }
+        state['gauges'] = self._gauges()
+        return state
+
+    def merge(self, states):
+        """Replace this registry's counters, histograms and gauges with the sum of several state() results."""
+        counters, histograms, gauges = {}, {}, {}
+        for state in states:
+            for key, value in state['counters'].items():
+                counters[key] = counters.get(key, 0) + value
+            for key, (counts, total, count) in state['histograms'].items():
+                histogram = histograms.get(key)
+                if histogram is None:
+                    histogram = histograms[key] = Histogram()
+                histogram.counts = [a + b for a, b in zip(histogram.counts, counts)]
+                histogram.total += total
+                histogram.count += count
+            for key, value in state['gauges'].items():
+                gauges[key] = gauges.get(key, 0) + value
+        with self._lock:
+            self._counters = counters
+            self._histograms = histograms
+            self._merged_gauges = gauges
+
+    def render_prometheus(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            typed = set()
+            for (name, key), value in counters:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} counter")
+                    typed.add(name)
+                lines.append(f"{name}{_format_labels(key)} {value}")
+            for (name, key), histogram in histograms:
+                if name not in typed:
+                    lines.append(f"# TYPE {name} histogram")
+                    typed.add(name)
+                for bound, count in histogram.cumulative():
+                    lines.append(f"{name}_bucket{_format_labels(key, [('le', bound)])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram.count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {histogram.total:.6f}")
+                lines.append(f"{name}_count{_format_labels(key)} {histogram.count}")
+        for (name, key), value in sorted(self._gauges().items()):
+            if name not in typed:
+                lines.append(f"# TYPE {name} gauge")
+                typed.add(name)
+            lines.append(f"{name}{_format_labels(key)} {value}")
+        return '\n'.join(lines) + '\n'
+
+    def snapshot(self):
+        """Return all metrics as a JSON-serializable dict."""
+        def labelled(name, key):
+            return name + _format_labels(key)
+
+        with self._lock:
+            snapshot = {
+                'timestamp': time.time(),
+                'counters': {labelled(name, key): value for (name, key), value in self._counters.items()},
+                'histograms': {
+                    labelled(name, key): {
+                        'count': histogram.count,
+                        'sum': round(histogram.total, 6),
+                        'mean': round(histogram.total / histogram.count, 6) if histogram.count else 0.0
+                    }
+                    for (name, key), histogram in self._histograms.items()
+                },
+            }
+        snapshot['gauges'] = {labelled(name, key): value for (name, key), value in self._gauges().items()}
+        return snapshot
+
+    def dump_jsonl(self, path):
+        """Append a snapshot of all metrics as one JSON line."""
+        try:
+            with open(path, 'a') as f:
+                f.write(json.dumps(self.snapshot()) + '\n')
+        except OSError as e:
+            logger.error("Error writing metrics to %s: %s", path, e)
+
+    def serve(self, port, host='127.0.0.1'):
+        """Serve /metrics in Prometheus text format from a background thread."""
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        metrics = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = metrics.render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+        logger.info("Serving metrics on http://%s:%s/metrics", host, port)
+        return server
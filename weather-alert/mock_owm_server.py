@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+"""
+Mock OpenWeatherMap Server
+
+A local stand-in for the OpenWeatherMap API used for load testing the Weather Alert System
+without spending API quota. It serves /weather, /forecast and /group with synthetic but
+realistic payloads, and can inject latency and errors.
+Usage: python mock_owm_server.py [--port 8099] [--latency 50] [--error-rate 0.01]
+Point [api] base_url at http://127.0.0.1:<port>/data/2.5 to use it.
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+CONDITIONS = [
+    ('Clear', 'clear sky', 800),
+    ('Clouds', 'scattered clouds', 802),
+    ('Clouds', 'overcast clouds', 804),
+    ('Rain', 'light rain', 500),
+    ('Rain', 'heavy intensity rain', 502),
+    ('Thunderstorm', 'thunderstorm with rain', 201),
+    ('Snow', 'light snow', 600),
+    ('Mist', 'mist', 701),
+]
+
+# The real group endpoint rejects more than 20 IDs
+MAX_GROUP_SIZE = 20
+
+
+def city_seed(key):
+    """Stable seed for a city so repeated requests return consistent conditions."""
+    return zlib.crc32(str(key).encode('utf-8'))
+
+
+def synthetic_weather(name, city_id, units='imperial', now=None):
+    """Build a current-weather payload shaped like the real /weather response."""
+    now = int(time.time() if now is None else now)
+    # Observations change every 10 minutes, like the real API
+    observed = now - now % 600
+    rng = random.Random(city_seed(name) ^ observed)
+    main, description, code = rng.choice(CONDITIONS)
+    temp_c = rng.uniform(-15, 42)
+    wind_ms = abs(rng.gauss(5, 4))
+    if units == 'imperial':
+        temp, feels_like, wind = temp_c * 9 / 5 + 32, temp_c * 9 / 5 + 32 + rng.uniform(-5, 5), wind_ms * 2.237
+    elif units == 'metric':
+        temp, feels_like, wind = temp_c, temp_c + rng.uniform(-3, 3), wind_ms
+    else:
+        temp, feels_like, wind = temp_c + 273.15, temp_c + 273.15 + rng.uniform(-3, 3), wind_ms
+
+    payload = {
+        'coord': {'lon': round(rng.uniform(-180, 180), 4), 'lat': round(rng.uniform(-60, 70), 4)},
+        'weather': [{'id': code, 'main': main, 'description': description, 'icon': '01d'}],
+        'base': 'stations',
+        'main': {
+            'temp': round(temp, 2),
+            'feels_like': round(feels_like, 2),
+            'temp_min': round(temp - 2, 2),
+            'temp_max': round(temp + 2, 2),
+            'pressure': rng.randint(980, 1040),
+            'humidity': rng.randint(15, 100),
+        },
+        'visibility': 10000,
+        'wind': {'speed': round(wind, 2), 'deg': rng.randint(0, 359)},
+        'clouds': {'all': rng.randint(0, 100)},
+        'dt': observed,
+        'sys': {'country': 'US', 'sunrise': observed - 21600, 'sunset': observed + 21600},
+        'timezone': 0,
+        'id': city_id,
+        'name': name,
+        'cod': 200,
+    }
+    if main == 'Rain':
+        payload['rain'] = {'1h': round(rng.uniform(0.2, 20), 2)}
+    return payload
+
+
+def synthetic_forecast(name, city_id, units='imperial', now=None):
+    """Build a 5-day / 3-hour forecast payload shaped like the real /forecast response."""
+    now = int(time.time() if now is None else now)
+    start = now - now % 10800 + 10800
+    steps = []
+    for i in range(40):
+        step = synthetic_weather(name, city_id, units, now=start + i * 10800)
+        steps.append({
+            'dt': start + i * 10800,
+            'main': step['main'],
+            'weather': step['weather'],
+            'clouds': step['clouds'],
+            'wind': step['wind'],
+            'pop': round(random.Random(city_seed(name) + i).random(), 2),
+            'dt_txt': time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(start + i * 10800)),
+        })
+    return {'cod': '200', 'message': 0, 'cnt': len(steps), 'list': steps,
+            'city': {'id': city_id, 'name': name}}
+
+
+class MockOpenWeatherMap(ThreadingHTTPServer):
+    """Threaded HTTP server holding the latency/error settings and request counters."""
+
+    daemon_threads = True
+
+    def __init__(self, address, latency=0.0, jitter=0.0, error_rate=0.0, throttle_rate=0.0, seed=None):
+        super().__init__(address, MockRequestHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.random = random.Random(seed)
+        self.stats = {'requests': 0, 'errors': 0, 'throttled': 0}
+        # Names seen in /weather?q= lookups, so group responses use the same city as the name
+        self.names = {}
+        self.stats_lock = threading.Lock()
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+
+class MockRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        server = self.server
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        endpoint = url.path.rstrip('/').rsplit('/', 1)[-1]
+
+        if endpoint == '__stats':
+            with server.stats_lock:
+                self._send_json(200, dict(server.stats))
+            return
+
+        server.count('requests')
+        if server.latency or server.jitter:
+            time.sleep(max(0.0, server.latency + server.random.uniform(-server.jitter, server.jitter)))
+
+        roll = server.random.random()
+        if roll < server.throttle_rate:
+            server.count('throttled')
+            self._send_json(429, {'cod': 429, 'message': 'Too many requests'}, {'Retry-After': '1'})
+            return
+        if roll < server.throttle_rate + server.error_rate:
+            server.count('errors')
+            self._send_json(503, {'cod': 503, 'message': 'Service unavailable'})
+            return
+
+        units = params.get('units', 'standard')
+        if endpoint == 'group':
+            ids = [city_id for city_id in params.get('id', '').split(',') if city_id]
+            if not ids or len(ids) > MAX_GROUP_SIZE:
+                self._send_json(400, {'cod': '400', 'message': 'wrong number of ids'})
+                return
+            results = [
+                synthetic_weather(server.names.get(int(city_id), f"City {city_id}"), int(city_id), units)
+                for city_id in ids
+            ]
+            self._send_json(200, {'cnt': len(results), 'list': results})
+            return
+
+        if endpoint not in ('weather', 'forecast'):
+            self._send_json(404, {'cod': '404', 'message': 'Internal error'})
+            return
+
+        if 'id' in params:
+            name, city_id = f"City {params['id']}", int(params['id'])
+        elif 'q' in params:
+            name = params['q']
+            city_id = city_seed(name) % 9000000 + 1000000
+            server.names[city_id] = name
+        elif 'lat' in params and 'lon' in params:
+            name = f"{float(params['lat']):.4f},{float(params['lon']):.4f}"
+            city_id = city_seed(name) % 9000000 + 1000000
+        else:
+            self._send_json(400, {'cod': '400', 'message': 'Nothing to geocode'})
+            return
+
+        if endpoint == 'weather':
+            self._send_json(200, synthetic_weather(name, city_id, units))
+        else:
+            self._send_json(200, synthetic_forecast(name, city_id, units))
+
+
+def start_server(port=0, host='127.0.0.1', **options):
+    """Start a mock server on a background thread and return it; server.server_port holds the port."""
+    server = MockOpenWeatherMap((host, port), **options)
+    threading.Thread(target=server.serve_forever, name="mock-owm", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock OpenWeatherMap server for load testing")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--port', type=int, default=8099, help='Port to listen on')
+    parser.add_argument('--latency', type=float, default=50, help='Mean response latency in milliseconds')
+    parser.add_argument('--jitter', type=float, default=0, help='Random +/- latency jitter in milliseconds')
+    parser.add_argument('--error-rate', type=float, default=0, help='Fraction of requests answered with HTTP 503')
+    parser.add_argument('--throttle-rate', type=float, default=0, help='Fraction of requests answered with HTTP 429')
+    parser.add_argument('--seed', type=int, help='Random seed for latency and error injection')
+    args = parser.parse_args()
+
+    server = MockOpenWeatherMap(
+        (args.host, args.port),
+        latency=args.latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed
+    )
+    print(f"Mock OpenWeatherMap listening on http://{args.host}:{server.server_port}/data/2.5", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Mock Notification Receivers
+
+Local stand-ins for the notification sinks of the Weather Alert System, for testing alert
+delivery end to end: a webhook endpoint, a UDP syslog listener and a minimal SMTP server.
+Everything received is printed to stdout as one JSON object per line.
+Usage: python mock_receivers.py [--webhook-port 8090] [--syslog-port 5514] [--smtp-port 8025]
+                                [--webhook-delay 0] [--webhook-error-rate 0]
+Point [webhook] url at http://127.0.0.1:8090/alerts, [syslog] address at 127.0.0.1:5514 and
+[email] smtp_server/smtp_port at 127.0.0.1:8025 with use_tls = false.
+"""
+
+import argparse
+import json
+import random
+import socketserver
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_print_lock = threading.Lock()
+
+
+def emit(kind, **fields):
+    """Print one received item as a JSON line."""
+    with _print_lock:
+        sys.stdout.write(json.dumps(dict(fields, receiver=kind, t=round(time.time(), 3))) + '\n')
+        sys.stdout.flush()
+
+
+class WebhookServer(ThreadingHTTPServer):
+    """Accepts POSTed notification batches, optionally slowly or with injected failures."""
+
+    daemon_threads = True
+
+    def __init__(self, address, delay=0.0, error_rate=0.0, seed=None):
+        super().__init__(address, WebhookHandler)
+        self.delay = delay
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.stats = {'batches': 0, 'notifications': 0, 'errors': 0}
+        self.stats_lock = threading.Lock()
+
+
+class WebhookHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path.rstrip('/') == '/__stats':
+            with self.server.stats_lock:
+                self._reply(200, dict(self.server.stats))
+        else:
+            self._reply(404, {'error': 'not found'})
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if server.delay:
+            time.sleep(server.delay)
+        if server.random.random() < server.error_rate:
+            with server.stats_lock:
+                server.stats['errors'] += 1
+            self._reply(503, {'error': 'injected failure'})
+            return
+        notifications = json.loads(body or b'{}').get('notifications', [])
+        with server.stats_lock:
+            server.stats['batches'] += 1
+            server.stats['notifications'] += len(notifications)
+        for notification in notifications:
+            emit('webhook', path=self.path, **notification)
+        self._reply(200, {'received': len(notifications)})
+
+
+class SyslogHandler(socketserver.BaseRequestHandler):
+    def handle(self):
+        emit('syslog', message=self.request[0].decode('utf-8', 'replace').rstrip('\x00\n'))
+
+
+class SMTPHandler(socketserver.StreamRequestHandler):
+    """Just enough SMTP to accept messages from smtplib without TLS or authentication."""
+
+    def reply(self, line):
+        self.wfile.write(line.encode('ascii') + b'\r\n')
+
+    def handle(self):
+        self.reply('220 mock-smtp ready')
+        sender, recipients = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode('utf-8', 'replace').strip()
+            verb = command.split(' ', 1)[0].upper()
+            if verb in ('EHLO', 'HELO'):
+                self.reply('250 mock-smtp')
+            elif verb == 'MAIL':
+                sender, recipients = command.split(':', 1)[1].strip(), []
+                self.reply('250 OK')
+            elif verb == 'RCPT':
+                recipients.append(command.split(':', 1)[1].strip())
+                self.reply('250 OK')
+            elif verb == 'DATA':
+                self.reply('354 End data with <CR><LF>.<CR><LF>')
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b'.\r\n', b'.\n'):
+                        break
+                    lines.append(data.decode('utf-8', 'replace').rstrip('\r\n'))
+                subject = next((line[9:] for line in lines if line.startswith('Subject: ')), '')
+                emit('smtp', sender=sender, recipients=recipients, subject=subject, lines=len(lines))
+                self.reply('250 OK')
+            elif verb in ('RSET', 'NOOP'):
+                self.reply('250 OK')
+            elif verb == 'QUIT':
+                self.reply('221 Bye')
+                return
+            else:
+                self.reply('502 Command not implemented')
+
+
+class ThreadingUDPServer(socketserver.ThreadingMixIn, socketserver.UDPServer):
+    daemon_threads = True
+
+
+class ThreadingTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_receivers(host='127.0.0.1', webhook_port=0, syslog_port=0, smtp_port=0, **webhook_options):
+    """Start all three receivers on background threads and return them as a dict; port 0 picks a free port."""
+    servers = {
+        'webhook': WebhookServer((host, webhook_port), **webhook_options),
+        'syslog': ThreadingUDPServer((host, syslog_port), SyslogHandler),
+        'smtp': ThreadingTCPServer((host, smtp_port), SMTPHandler),
+    }
+    for name, server in servers.items():
+        threading.Thread(target=server.serve_forever, name=f"mock-{name}", daemon=True).start()
+    return servers
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock webhook, syslog and SMTP receivers for alert delivery tests")
+    parser.add_argument('--host', default='127.0.0.1', help='Address to bind')
+    parser.add_argument('--webhook-port', type=int, default=8090, help='HTTP port for webhook POSTs')
+    parser.add_argument('--syslog-port', type=int, default=5514, help='UDP port for syslog messages')
+    parser.add_argument('--smtp-port', type=int, default=8025, help='TCP port for SMTP')
+    parser.add_argument('--webhook-delay', type=float, default=0, help='Seconds to wait before answering each POST')
+    parser.add_argument('--webhook-error-rate', type=float, default=0, help='Fraction of POSTs answered with HTTP 503')
+    parser.add_argument('--seed', type=int, help='Random seed for error injection')
+    args = parser.parse_args()
+
+    servers = start_receivers(
+        args.host, args.webhook_port, args.syslog_port, args.smtp_port,
+        delay=args.webhook_delay, error_rate=args.webhook_error_rate, seed=args.seed
+    )
+    print(f"Webhook on http://{args.host}:{servers['webhook'].server_port}/alerts, "
+          f"syslog on udp://{args.host}:{servers['syslog'].server_address[1]}, "
+          f"SMTP on {args.host}:{servers['smtp'].server_address[1]}", file=sys.stderr, flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
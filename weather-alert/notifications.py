@@ -0,0 +1,279 @@
+import json
+import logging
+import logging.handlers
+import queue
+import socket
+import threading
+import time
+
+from resilience import backoff_delay
+
+logger = logging.getLogger("weather_alert_system.notify")
+
+# What a sink does when its queue is full
+SHED_POLICIES = ('drop_newest', 'drop_oldest', 'block')
+
+# Queue markers understood by the worker threads
+_FLUSH = object()
+_STOP = object()
+
+
+class NotificationSink:
+    """Delivers notifications from a bounded queue on its own worker thread, in batches, with retries.
+
+    Subclasses implement deliver(batch). When the queue is full the shed policy decides whether the
+    new notification is dropped (drop_newest), the oldest queued one is dropped (drop_oldest), or the
+    caller waits up to block_timeout seconds before dropping (block).
+    """
+
+    def __init__(self, name, queue_size=1000, batch_size=50, batch_interval=1.0, max_retries=3,
+                 backoff_base=1.0, backoff_max=30.0, policy='drop_newest', block_timeout=1.0):
+        """Create the sink; call start() before submitting notifications."""
+        if policy not in SHED_POLICIES:
+            raise ValueError(f"Unknown shed policy '{policy}'. Choose from: {', '.join(SHED_POLICIES)}")
+        self.name = name
+        self.batch_size = max(1, batch_size)
+        self.batch_interval = batch_interval
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.stats = {'sent': 0, 'failed': 0, 'dropped': 0, 'retries': 0}
+        self._queue = queue.Queue(maxsize=max(1, queue_size))
+        self._shedding = False
+        self._cycle_ended = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background delivery thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"notify-{self.name}", daemon=True)
+            self._thread.start()
+
+    def submit(self, location, alerts):
+        """Queue a notification for a location; never waits longer than the shed policy allows."""
+        if not alerts:
+            return
+        self._enqueue({'time': time.time(), 'location': location, 'alerts': alerts})
+
+    def _enqueue(self, notification):
+        try:
+            if self.policy == 'block':
+                self._queue.put(notification, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(notification)
+            self._shedding = False
+            return
+        except queue.Full:
+            pass
+
+        if self.policy == 'drop_oldest':
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(notification)
+            except (queue.Empty, queue.Full):
+                pass
+        self.stats['dropped'] += 1
+        if not self._shedding:
+            # Logged once per backlog rather than once per dropped notification
+            self._shedding = True
+            logger.warning("Notification queue for %s is full; shedding notifications (%s)", self.name, self.policy)
+
+    def end_cycle(self):
+        """Deliver what has been batched so far instead of waiting for the batch to fill."""
+        self._cycle_ended.set()
+        try:
+            self._queue.put_nowait(_FLUSH)
+        except queue.Full:
+            # The worker is busy anyway; it checks _cycle_ended once the queue drains
+            pass
+
+    def stop(self, timeout=None):
+        """Deliver everything still queued, then stop the worker thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+        self.close()
+
+    def deliver(self, batch):
+        """Send a batch of notifications; raise on failure to have it retried."""
+        raise NotImplementedError
+
+    def close(self):
+        """Release any connection or file held by the sink."""
+
+    def cycle_done(self):
+        """Called on the worker thread once everything queued before end_cycle() has been delivered."""
+
+    def _run(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            if item is _FLUSH:
+                self._check_cycle_done()
+                continue
+            batch = [item]
+            deadline = time.monotonic() + self.batch_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                if item is _FLUSH:
+                    break
+                batch.append(item)
+            self._deliver_with_retry(batch)
+            self._check_cycle_done()
+
+    def _check_cycle_done(self):
+        if self._cycle_ended.is_set() and self._queue.empty():
+            self._cycle_ended.clear()
+            self.cycle_done()
+
+    def _deliver_with_retry(self, batch):
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.deliver(batch)
+                self.stats['sent'] += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self.stats['failed'] += len(batch)
+                    logger.error("Error delivering %d notifications to %s: %s", len(batch), self.name, e)
+                    return
+                self.stats['retries'] += 1
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                logger.warning("Error delivering notifications to %s: %s; retrying in %.1f seconds",
+                               self.name, e, delay)
+                time.sleep(delay)
+
+
+class WebhookSink(NotificationSink):
+    """POSTs each batch as {"notifications": [...]} JSON to an HTTP endpoint."""
+
+    def __init__(self, url, timeout=10, **options):
+        super().__init__('webhook', **options)
+        self.url = url
+        self.timeout = timeout
+        import requests
+        self._session = requests.Session()
+
+    def deliver(self, batch):
+        response = self._session.post(self.url, json={'notifications': batch}, timeout=self.timeout)
+        response.raise_for_status()
+
+    def close(self):
+        self._session.close()
+
+
+class JsonLinesSink(NotificationSink):
+    """Appends one JSON line per notification to a local file."""
+
+    def __init__(self, path, **options):
+        super().__init__('file', **options)
+        self.path = path
+
+    def deliver(self, batch):
+        lines = ''.join(json.dumps(notification, ensure_ascii=False) + '\n' for notification in batch)
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+
+class _RaisingSysLogHandler(logging.handlers.SysLogHandler):
+    """SysLogHandler that lets send errors propagate so the sink can retry them."""
+
+    def handleError(self, record):
+        raise
+
+
+class SyslogSink(NotificationSink):
+    """Sends one syslog message per alert; severe alerts are logged as critical, moderate as warnings."""
+
+    LEVELS = {'severe': logging.CRITICAL, 'moderate': logging.WARNING}
+
+    def __init__(self, address='/dev/log', facility='user', **options):
+        """address is a Unix socket path or host:port (UDP)."""
+        super().__init__('syslog', **options)
+        if ':' in address and not address.startswith('/'):
+            host, port = address.rsplit(':', 1)
+            address = (host, int(port))
+        self._handler = _RaisingSysLogHandler(address=address, facility=facility, socktype=socket.SOCK_DGRAM)
+        self._handler.ident = 'weather-alert: '
+
+    def deliver(self, batch):
+        for notification in batch:
+            for alert in notification['alerts']:
+                record = logging.LogRecord(
+                    "weather_alert_system.alerts", self.LEVELS.get(alert['type'], logging.INFO), __file__, 0,
+                    "%s: %s: %s", (notification['location'], alert['title'], alert['message']), None
+                )
+                self._handler.handle(record)
+
+    def close(self):
+        self._handler.close()
+
+
+class DryRunSink:
+    """Counts the notifications it is given instead of delivering them; used while replaying captures."""
+
+    def __init__(self):
+        self.stats = {'not_delivered': 0}
+
+    def start(self):
+        pass
+
+    def submit(self, location, alerts):
+        if alerts:
+            self.stats['not_delivered'] += 1
+            logger.debug("Not delivering %d alerts for %s (dry run)", len(alerts), location)
+
+    def end_cycle(self):
+        pass
+
+    def stop(self, timeout=None):
+        pass
+
+
+class NotificationRouter:
+    """Fans each notification out to every configured sink; no sink waits on another."""
+
+    def __init__(self, sinks=None):
+        """sinks maps a name to anything with start/submit/end_cycle/stop and a stats dict."""
+        self.sinks = dict(sinks or {})
+
+    def __bool__(self):
+        return bool(self.sinks)
+
+    def start(self):
+        for sink in self.sinks.values():
+            sink.start()
+
+    def submit(self, location, alerts):
+        if not alerts:
+            return
+        for sink in self.sinks.values():
+            sink.submit(location, alerts)
+
+    def end_cycle(self):
+        for sink in self.sinks.values():
+            sink.end_cycle()
+
+    def stop(self, timeout=None):
+        for sink in self.sinks.values():
+            sink.stop(timeout)
+
+    def collect_stats(self):
+        """Return (sink, result, count) for every sink counter."""
+        return [
+            (name, result, count)
+            for name, sink in self.sinks.items()
+            for result, count in sink.stats.items()
+        ]
@@ -0,0 +1,218 @@
+import json
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+
+logger = logging.getLogger("weather_alert_system.history")
+
+# One fixed-width little-endian record per (location, observation time)
+FIELDS = ('temp', 'feels_like', 'humidity', 'pressure', 'wind_speed', 'rain_1h')
+RECORD = struct.Struct('<Iq' + 'f' * len(FIELDS))
+
+# numpy and the record dtype are loaded by _load_numpy the first time stats are queried
+np = None
+RECORD_DTYPE = None
+
+
+def _load_numpy():
+    """Import numpy on first use; returns None when it is not installed."""
+    global np, RECORD_DTYPE
+    if np is None:
+        try:
+            import numpy
+        except ImportError:
+            return None
+        RECORD_DTYPE = numpy.dtype([('location', '<u4'), ('dt', '<i8')] + [(field, '<f4') for field in FIELDS])
+        np = numpy
+    return np
+
+
+def _value(value):
+    return float('nan') if value is None else float(value)
+
+
+class ObservationHistory:
+    """Append-only on-disk time series of observations with windowed min/max/mean queries."""
+
+    def __init__(self, path='weather_history'):
+        """Open the history stored in <path>.dat, with location names kept in <path>.idx.json."""
+        self.data_path = f"{path}.dat"
+        self.index_path = f"{path}.idx.json"
+        self._ids = {}
+        # Newest observation time recorded per location, so a re-served observation is not stored twice
+        self._last_dt = {}
+        self._index_dirty = False
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, 'r') as f:
+                index = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable history index %s: %s", self.index_path, e)
+            return
+        if 'ids' in index and isinstance(index['ids'], dict):
+            self._ids = index['ids']
+            self._last_dt = index.get('last_dt', {})
+        else:
+            # Index written before the last observation times were kept: recover them from the data once
+            self._ids = index
+            self._last_dt = self._scan_last_dt()
+            self._index_dirty = True
+
+    def _scan_last_dt(self):
+        names = {location_id: name for name, location_id in self._ids.items()}
+        last_dt = {}
+        try:
+            with open(self.data_path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return last_dt
+        for record in RECORD.iter_unpack(data[:len(data) - len(data) % RECORD.size]):
+            name = names.get(record[0])
+            if name is not None and record[1] > last_dt.get(name, record[1] - 1):
+                last_dt[name] = record[1]
+        return last_dt
+
+    def _location_id(self, location):
+        location_id = self._ids.get(location)
+        if location_id is None:
+            location_id = len(self._ids)
+            self._ids[location] = location_id
+            self._index_dirty = True
+        return location_id
+
+    def append(self, location, weather_data):
+        """Buffer one observation; nothing is written until flush().
+
+        Observations not newer than the last one recorded for the location (the same reading served
+        again from the response cache, for instance) are skipped.
+        """
+        if not weather_data:
+            return
+        dt = int(weather_data.get('dt', 0))
+        main = weather_data.get('main', {})
+        with self._lock:
+            last_dt = self._last_dt.get(location)
+            if last_dt is not None and dt <= last_dt:
+                return
+            self._last_dt[location] = dt
+            self._index_dirty = True
+            self._buffer += RECORD.pack(
+                self._location_id(location),
+                dt,
+                _value(main.get('temp')),
+                _value(main.get('feels_like')),
+                _value(main.get('humidity')),
+                _value(main.get('pressure')),
+                _value(weather_data.get('wind', {}).get('speed')),
+                _value(weather_data.get('rain', {}).get('1h')),
+            )
+
+    def flush(self):
+        """Write all observations buffered during this cycle with a single append."""
+        with self._lock:
+            buffer, self._buffer = self._buffer, bytearray()
+            index = {'ids': dict(self._ids), 'last_dt': dict(self._last_dt)} if self._index_dirty else None
+            self._index_dirty = False
+
+        try:
+            # The index is written first so every stored record has a known location
+            if index is not None:
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, 'w') as f:
+                    json.dump(index, f)
+                os.replace(tmp_path, self.index_path)
+            if buffer:
+                with open(self.data_path, 'ab') as f:
+                    f.write(buffer)
+                logger.info("Recorded %s observations to %s", len(buffer) // RECORD.size, self.data_path)
+        except OSError as e:
+            logger.error("Error writing observation history: %s", e)
+
+    def stats(self, field, start=None, end=None, location=None):
+        """Return {location: {'min', 'max', 'mean', 'count'}} for a field over [start, end] (Unix times).
+
+        Pass location to restrict the query to one location; otherwise every location is summarised.
+        """
+        if field not in FIELDS:
+            raise ValueError(f"Unknown history field '{field}'. Choose from: {', '.join(FIELDS)}")
+
+        location_id = None
+        if location is not None:
+            location_id = self._ids.get(location)
+            if location_id is None:
+                return {}
+
+        if not os.path.exists(self.data_path) or os.path.getsize(self.data_path) < RECORD.size:
+            return {}
+
+        with open(self.data_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            usable = len(mm) - len(mm) % RECORD.size
+            if _load_numpy() is not None:
+                totals = self._stats_numpy(mm, usable, field, start, end, location_id)
+            else:
+                totals = self._stats_scan(mm, usable, field, start, end, location_id)
+
+        names = {location_id: name for name, location_id in self._ids.items()}
+        return {
+            names.get(location_id, str(location_id)): {
+                'min': low, 'max': high, 'mean': total / count, 'count': count
+            }
+            for location_id, (low, high, total, count) in totals.items()
+        }
+
+    def _stats_numpy(self, mm, usable, field, start, end, location_id):
+        # A zero-copy view of the mapped file; only the selected column is materialized
+        records = np.frombuffer(mm, dtype=RECORD_DTYPE, count=usable // RECORD.size)
+        mask = np.ones(len(records), dtype=bool)
+        if start is not None:
+            mask &= records['dt'] >= start
+        if end is not None:
+            mask &= records['dt'] <= end
+        if location_id is not None:
+            mask &= records['location'] == location_id
+
+        values = records[field].astype(np.float64)
+        mask &= ~np.isnan(values)
+        ids = records['location'][mask].astype(np.intp)
+        values = values[mask]
+        del records
+        if not len(ids):
+            return {}
+
+        size = int(ids.max()) + 1
+        counts = np.bincount(ids, minlength=size)
+        sums = np.bincount(ids, weights=values, minlength=size)
+        lows = np.full(size, np.inf)
+        highs = np.full(size, -np.inf)
+        np.minimum.at(lows, ids, values)
+        np.maximum.at(highs, ids, values)
+
+        return {
+            int(i): (float(lows[i]), float(highs[i]), float(sums[i]), int(counts[i]))
+            for i in np.flatnonzero(counts).tolist()
+        }
+
+    def _stats_scan(self, mm, usable, field, start, end, location_id):
+        column = 2 + FIELDS.index(field)
+        totals = {}
+        with memoryview(mm) as view, view[:usable] as records:
+            for record in RECORD.iter_unpack(records):
+                if location_id is not None and record[0] != location_id:
+                    continue
+                if (start is not None and record[1] < start) or (end is not None and record[1] > end):
+                    continue
+                value = record[column]
+                if math.isnan(value):
+                    continue
+                low, high, total, count = totals.get(record[0], (value, value, 0.0, 0))
+                totals[record[0]] = (min(low, value), max(high, value), total + value, count + 1)
+        return totals
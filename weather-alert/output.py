@@ -0,0 +1,108 @@
+import json
+import sys
+
+OUTPUT_FORMATS = ('table', 'jsonl', 'none')
+
+
+class _StreamOutput:
+    """Base for writers printing to a stream; without an explicit one, sys.stdout is looked up at each write."""
+
+    def __init__(self, stream=None):
+        self._stream = stream
+
+    @property
+    def stream(self):
+        # Looked up late so contextlib.redirect_stdout (as used by benchmark.py) takes effect
+        return self._stream or sys.stdout
+
+
+class TableOutput(_StreamOutput):
+    """Human-readable output: a table and alert list per location, written as each location finishes."""
+
+    def __init__(self, format_display, stream=None):
+        """format_display(weather_data, location) renders the weather table for a location."""
+        super().__init__(stream)
+        self.format_display = format_display
+
+    def location(self, location, weather_data, alerts):
+        lines = [f"\n{'-'*50}", self.format_display(weather_data, location)]
+        if alerts:
+            lines.append(f"\nALERTS FOR {location.upper()}:")
+            for alert in alerts:
+                lines.append(f"[{alert['type'].upper()}] {alert['title']}: {alert['message']}")
+        else:
+            lines.append(f"\nNo weather alerts for {location}")
+        lines.append(f"{'-'*50}\n")
+        # One write per location instead of one per line
+        self.stream.write('\n'.join(lines) + '\n')
+
+    def forecast(self, location, alerts):
+        if not alerts:
+            return
+        lines = [f"\nFORECAST ALERTS FOR {location.upper()}:"]
+        for alert in alerts:
+            lines.append(f"[{alert['type'].upper()}] {alert['title']}: {alert['message']}")
+        self.stream.write('\n'.join(lines) + '\n')
+
+    def end_cycle(self):
+        self.stream.flush()
+
+
+class JsonLinesOutput(_StreamOutput):
+    """Machine-readable output: one JSON object per location, written in a single buffered write per cycle."""
+
+    def __init__(self, stream=None):
+        super().__init__(stream)
+        self._lines = []
+
+    def location(self, location, weather_data, alerts):
+        main = weather_data.get('main', {})
+        conditions = weather_data.get('weather') or [{}]
+        self._lines.append(json.dumps({
+            'type': 'observation',
+            'location': location,
+            'dt': weather_data.get('dt'),
+            'condition': conditions[0].get('main'),
+            'description': conditions[0].get('description'),
+            'temp': main.get('temp'),
+            'feels_like': main.get('feels_like'),
+            'humidity': main.get('humidity'),
+            'wind_speed': weather_data.get('wind', {}).get('speed'),
+            'alerts': alerts,
+        }, ensure_ascii=False))
+
+    def forecast(self, location, alerts):
+        if alerts:
+            self._lines.append(json.dumps(
+                {'type': 'forecast', 'location': location, 'alerts': alerts}, ensure_ascii=False
+            ))
+
+    def end_cycle(self):
+        if self._lines:
+            lines, self._lines = self._lines, []
+            self.stream.write('\n'.join(lines) + '\n')
+        self.stream.flush()
+
+
+class NullOutput:
+    """No output at all, for headless daemons; nothing is formatted."""
+
+    def location(self, location, weather_data, alerts):
+        pass
+
+    def forecast(self, location, alerts):
+        pass
+
+    def end_cycle(self):
+        pass
+
+
+def create_output(output_format, format_display, stream=None):
+    """Return the output writer for a --format value."""
+    if output_format == 'jsonl':
+        return JsonLinesOutput(stream)
+    if output_format == 'none':
+        return NullOutput()
+    if output_format == 'table':
+        return TableOutput(format_display, stream)
+    raise ValueError(f"Unknown output format '{output_format}'. Choose from: {', '.join(OUTPUT_FORMATS)}")
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+logger = logging.getLogger("weather_alert_system.server")
+
+API_PREFIX = '/v1/locations'
+
+
+def _etag(value):
+    """Weak ETag for a JSON-serializable value; equal content always gives the same tag."""
+    digest = hashlib.sha1(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+    return f'W/"{digest.hexdigest()[:20]}"'
+
+
+class ObservationStore:
+    """Latest observation and active alerts per location, shared by the poller and the API threads.
+
+    Entries are encoded to JSON once when they are published, so serving a read only copies bytes.
+    """
+
+    def __init__(self, max_age=600):
+        """max_age is how long (seconds) an observation is served before it counts as stale."""
+        self.max_age = max_age
+        self._entries = {}
+        self._bulk = None
+        self._lock = threading.Lock()
+
+    def publish(self, location, weather_data, alerts, checked_at=None):
+        """Store the result of a check; the ETag changes only when the observation or alerts do."""
+        checked_at = time.time() if checked_at is None else checked_at
+        etag = _etag([weather_data, alerts])
+        with self._lock:
+            current = self._entries.get(location)
+            if current is not None and current['etag'] == etag:
+                # Same content checked again: only its age changes
+                current['checked_at'] = checked_at
+                return
+            entry = {
+                'location': location,
+                'observed_at': weather_data.get('dt'),
+                'observation': weather_data,
+                'alerts': alerts,
+            }
+            self._entries[location] = {
+                'entry': entry,
+                'body': json.dumps(entry, ensure_ascii=False).encode('utf-8'),
+                'etag': etag,
+                'checked_at': checked_at,
+            }
+            self._bulk = None
+
+    def publish_results(self, results):
+        """Store every location a check cycle returned data for (see WeatherAlertSystem.check_locations)."""
+        now = time.time()
+        for location, (weather_data, alerts) in results.items():
+            if weather_data:
+                self.publish(location, weather_data, alerts, now)
+
+    def discard(self, location):
+        with self._lock:
+            if self._entries.pop(location, None) is not None:
+                self._bulk = None
+
+    def get(self, location):
+        """Return (body, etag, age) of a location's latest entry, or None if it has not been checked yet."""
+        with self._lock:
+            stored = self._entries.get(location)
+            if stored is None:
+                return None
+            return stored['body'], stored['etag'], time.time() - stored['checked_at']
+
+    def is_fresh(self, location):
+        found = self.get(location)
+        return found is not None and found[2] < self.max_age
+
+    def bulk(self):
+        """Return (body, etag) for every location, rebuilding the document only after something changed."""
+        with self._lock:
+            if self._bulk is None:
+                entries = {location: stored['entry'] for location, stored in sorted(self._entries.items())}
+                # Names are part of the tag: the same observations under other locations are a different document
+                etag = _etag([[location, stored['etag']] for location, stored in sorted(self._entries.items())])
+                body = json.dumps({'locations': entries}, ensure_ascii=False).encode('utf-8')
+                self._bulk = (body, etag)
+            return self._bulk
+
+
+class QueryServer(ThreadingHTTPServer):
+    """Local HTTP/JSON API over an ObservationStore.
+
+    GET /v1/locations returns every location; GET /v1/locations/<name> returns one. Both send an
+    ETag and answer If-None-Match with 304. With read_through, a request for a location whose entry
+    is stale or missing fetches it through the system (and so through its response cache) first.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, system, store, read_through=True):
+        super().__init__(address, QueryHandler)
+        self.system = system
+        self.store = store
+        self.read_through = read_through
+        self._fetch_locks = {}
+        self._fetch_locks_lock = threading.Lock()
+
+    def refresh(self, location):
+        """Fetch and evaluate a location for a reader, unless another reader just did."""
+        with self._fetch_locks_lock:
+            lock = self._fetch_locks.setdefault(location, threading.Lock())
+        # Concurrent readers of the same stale location wait for one fetch instead of each making one
+        with lock:
+            if self.store.is_fresh(location):
+                return
+            weather_data = self.system.get_current_weather(location)
+            if weather_data:
+                self.store.publish(location, weather_data, self.system.generate_alerts(weather_data))
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status, body=b'', etag=None, max_age=None):
+        self.send_response(status)
+        if etag:
+            self.send_header('ETag', etag)
+        if max_age is not None:
+            self.send_header('Cache-Control', f"max-age={max(0, int(max_age))}")
+        if status != 304:
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304:
+            self.wfile.write(body)
+        self.server.system.metrics.inc('weather_api_requests_total', status=str(status))
+
+    def _error(self, status, message):
+        self._reply(status, json.dumps({'error': message}).encode('utf-8'))
+
+    def _send(self, body, etag, max_age=None):
+        # If-None-Match may list several tags; the weak comparison ignores the W/ prefix
+        wanted = {tag.strip().removeprefix('W/') for tag in self.headers.get('If-None-Match', '').split(',')}
+        if etag.removeprefix('W/') in wanted or '*' in wanted:
+            self._reply(304, etag=etag, max_age=max_age)
+        else:
+            self._reply(200, body, etag=etag, max_age=max_age)
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == API_PREFIX:
+            body, etag = server.store.bulk()
+            self._send(body, etag)
+            return
+        if not path.startswith(API_PREFIX + '/'):
+            self._error(404, 'not found')
+            return
+
+        location = unquote(path[len(API_PREFIX) + 1:])
+        if location not in server.system.locations:
+            # Only configured locations are served, so readers cannot spend quota on arbitrary lookups
+            self._error(404, f"unknown location '{location}'")
+            return
+        if server.read_through and not server.store.is_fresh(location):
+            try:
+                server.refresh(location)
+            except Exception as e:
+                logger.error("Error refreshing %s for an API read: %s", location, e)
+        found = server.store.get(location)
+        if found is None:
+            self._error(503, f"no observation for '{location}' yet")
+            return
+        body, etag, age = found
+        self._send(body, etag, max_age=server.store.max_age - age)
+
+
+def start_query_server(system, store, host='127.0.0.1', port=8088, read_through=True):
+    """Serve the API from a background thread and return the server."""
+    server = QueryServer((host, port), system, store, read_through=read_through)
+    threading.Thread(target=server.serve_forever, name="query-server", daemon=True).start()
+    logger.info("Serving weather API on http://%s:%s%s", host, server.server_port, API_PREFIX)
+    return server
@@ -0,0 +1,103 @@
+import logging
+import random
+import threading
+import time
+
+logger = logging.getLogger("weather_alert_system.resilience")
+
+# Status codes that mean "try again later" rather than "this request is wrong"
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket limiting requests to a steady rate with a bounded burst."""
+
+    def __init__(self, rate_per_minute, burst=1):
+        """Allow rate_per_minute requests on average and up to burst at once; a rate of 0 disables limiting."""
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available, then take it."""
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """Stops calls to an unhealthy upstream after repeated failures, probing again after a cool-off."""
+
+    def __init__(self, failure_threshold=5, reset_timeout=60):
+        """Open after failure_threshold consecutive failures; allow a trial call after reset_timeout seconds."""
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self._opened_at >= self.reset_timeout:
+                # Let exactly one trial request through
+                self.state = 'half-open'
+                logger.info("Circuit breaker half-open; sending a trial request")
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != 'closed':
+                logger.info("Circuit breaker closed; upstream has recovered")
+            self.state = 'closed'
+            self._failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == 'half-open' or (self.state == 'closed' and self._failures >= self.failure_threshold):
+                self.state = 'open'
+                self._opened_at = time.monotonic()
+                logger.warning("Circuit breaker open after %s failures; pausing requests for %s seconds",
+                               self._failures, self.reset_timeout)
+
+
+def parse_retry_after(value):
+    """Return the delay in seconds requested by a Retry-After header, or None if absent or invalid."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    # Imported here since the email package is slow to load and Retry-After dates are rare
+    from email.utils import parsedate_to_datetime
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base=1.0, cap=60.0, retry_after=None):
+    """Seconds to wait before retry number `attempt` (0-based): full-jitter exponential backoff.
+
+    A Retry-After value from the server takes precedence, still limited by cap.
+    """
+    if retry_after is not None:
+        return min(cap, retry_after)
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
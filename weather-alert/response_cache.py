@@ -0,0 +1,139 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger("weather_alert_system.cache")
+
+
+class ResponseCache:
+    """Two-tier TTL cache for API responses: a bounded in-memory LRU backed by an optional JSON file."""
+
+    def __init__(self, max_entries=5000, ttls=None, default_ttl=600, disk_path=None, enabled=True):
+        """Create the cache; ttls maps endpoint names to their time-to-live in seconds."""
+        self.enabled = enabled
+        self.max_entries = max(1, max_entries)
+        self.ttls = ttls or {}
+        self.default_ttl = default_ttl
+        self.disk_path = disk_path or None
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0}
+        self._memory = OrderedDict()
+        self._disk = {}
+        self._lock = threading.Lock()
+
+        if self.enabled and self.disk_path:
+            self._load()
+
+    @staticmethod
+    def make_key(endpoint, location, units):
+        """Build the cache key for an (endpoint, location, units) triple."""
+        return f"{endpoint}|{location}|{units}"
+
+    def _ttl(self, endpoint):
+        return self.ttls.get(endpoint, self.default_ttl)
+
+    def _is_fresh(self, entry, endpoint, now):
+        return now - entry['fetched_at'] < self._ttl(endpoint)
+
+    def get(self, endpoint, location, units):
+        """Return the cached response if it is still fresh, otherwise None."""
+        if not self.enabled:
+            return None
+
+        key = self.make_key(endpoint, location, units)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry, endpoint, now):
+                    self._memory.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return entry['data']
+                del self._memory[key]
+                self.stats['expired'] += 1
+
+            # Fall back to the entries loaded from disk at startup
+            entry = self._disk.pop(key, None)
+            if entry is not None:
+                if self._is_fresh(entry, endpoint, now):
+                    self._store(key, entry)
+                    self.stats['disk_hits'] += 1
+                    return entry['data']
+                self.stats['expired'] += 1
+
+            self.stats['misses'] += 1
+            return None
+
+    def put(self, endpoint, location, units, data):
+        """Store a response fetched just now."""
+        if not self.enabled or data is None:
+            return
+
+        entry = {
+            'fetched_at': time.time(),
+            # Upstream observation time, kept so stale payloads are easy to spot on disk
+            'dt': data.get('dt') if isinstance(data, dict) else None,
+            'data': data
+        }
+        with self._lock:
+            self._store(self.make_key(endpoint, location, units), entry)
+
+    def invalidate(self, location):
+        """Drop every cached response for a location."""
+        suffix_start = f"|{location}|"
+        with self._lock:
+            for store in (self._memory, self._disk):
+                for key in [k for k in store if suffix_start in k]:
+                    del store[key]
+
+    def _store(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats['evictions'] += 1
+
+    def _load(self):
+        """Load the on-disk tier, ignoring a missing or corrupt file."""
+        if not os.path.exists(self.disk_path):
+            return
+        try:
+            with open(self.disk_path, 'r') as f:
+                self._disk = json.load(f)
+            logger.info("Loaded %s cached responses from %s", len(self._disk), self.disk_path)
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable cache file %s: %s", self.disk_path, e)
+            self._disk = {}
+
+    def save(self):
+        """Write fresh entries to the on-disk tier so they survive a restart."""
+        if not self.enabled or not self.disk_path:
+            return
+
+        now = time.time()
+        with self._lock:
+            entries = dict(self._disk)
+            entries.update(self._memory)
+            entries = {
+                key: entry for key, entry in entries.items()
+                if self._is_fresh(entry, key.split('|', 1)[0], now)
+            }
+
+        tmp_path = f"{self.disk_path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(entries, f)
+            os.replace(tmp_path, self.disk_path)
+        except OSError as e:
+            logger.error("Error saving response cache to %s: %s", self.disk_path, e)
+
+    def log_stats(self):
+        """Log hit, miss and eviction counters."""
+        with self._lock:
+            size = len(self._memory)
+            stats = dict(self.stats)
+        logger.info("Cache stats: hits=%s disk_hits=%s misses=%s expired=%s evictions=%s size=%s/%s",
+                    stats['hits'], stats['disk_hits'], stats['misses'], stats['expired'], stats['evictions'],
+                    size, self.max_entries)
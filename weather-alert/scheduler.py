@@ -0,0 +1,117 @@
+import heapq
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger("weather_alert_system.scheduler")
+
+
+class AdaptiveScheduler:
+    """Priority-queue poll scheduler that polls active or fast-changing locations more often."""
+
+    def __init__(self, locations, min_interval=300, max_interval=3600, initial_interval=None,
+                 requests_per_minute=60, change_threshold=5.0, shrink=0.5, grow=1.5):
+        """Schedule every location to be polled immediately, then adapt each one's interval."""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.initial_interval = self._clamp(initial_interval or self.max_interval)
+        self.requests_per_minute = max(1, requests_per_minute)
+        self.change_threshold = change_threshold
+        self.shrink = shrink
+        self.grow = grow
+        self.intervals = {}
+        self._last_readings = {}
+        self._heap = []
+        self._entries = {}
+        self._sequence = 0
+        self._dispatched = deque()
+
+        now = time.time()
+        for location in locations:
+            self.add(location, now)
+
+    def _clamp(self, interval):
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def _push(self, location, due):
+        # The sequence number keeps heap order stable and marks older entries for the same location as stale
+        self._sequence += 1
+        self._entries[location] = self._sequence
+        heapq.heappush(self._heap, (due, self._sequence, location))
+
+    def _is_current(self, entry):
+        return self._entries.get(entry[2]) == entry[1]
+
+    def add(self, location, now=None):
+        """Start tracking a location, due immediately."""
+        if location in self.intervals:
+            return
+        self.intervals[location] = self.initial_interval
+        self._push(location, time.time() if now is None else now)
+
+    def remove(self, location):
+        """Stop polling a location; its heap entry is discarded lazily."""
+        self.intervals.pop(location, None)
+        self._entries.pop(location, None)
+        self._last_readings.pop(location, None)
+
+    def _budget(self, now):
+        while self._dispatched and now - self._dispatched[0] >= 60:
+            self._dispatched.popleft()
+        return self.requests_per_minute - len(self._dispatched)
+
+    def due(self, now=None):
+        """Pop the locations that are due now, limited by the requests-per-minute budget."""
+        now = time.time() if now is None else now
+        budget = self._budget(now)
+        locations = []
+        while self._heap and self._heap[0][0] <= now and len(locations) < budget:
+            entry = heapq.heappop(self._heap)
+            if self._is_current(entry):
+                del self._entries[entry[2]]
+                locations.append(entry[2])
+                self._dispatched.append(now)
+        return locations
+
+    def next_wakeup(self, now=None):
+        """Return how many seconds to sleep until a location is due and the budget allows polling it."""
+        now = time.time() if now is None else now
+        while self._heap and not self._is_current(self._heap[0]):
+            heapq.heappop(self._heap)
+        if not self._heap:
+            return self.max_interval
+        wait = self._heap[0][0] - now
+        if self._budget(now) <= 0:
+            wait = max(wait, self._dispatched[0] + 60 - now)
+        return max(0.0, wait)
+
+    def _changed_fast(self, location, weather_data):
+        """Return True if temperature or wind moved by at least change_threshold since the last poll."""
+        readings = (
+            weather_data.get('main', {}).get('temp'),
+            weather_data.get('wind', {}).get('speed'),
+        )
+        previous = self._last_readings.get(location)
+        self._last_readings[location] = readings
+        if previous is None:
+            return False
+        return any(
+            old is not None and new is not None and abs(new - old) >= self.change_threshold
+            for old, new in zip(previous, readings)
+        )
+
+    def update(self, location, weather_data, alerts, now=None):
+        """Reschedule a polled location based on its latest data and alerts."""
+        if location not in self.intervals:
+            return
+        now = time.time() if now is None else now
+        interval = self.intervals[location]
+
+        if weather_data:
+            if alerts or self._changed_fast(location, weather_data):
+                interval = self._clamp(interval * self.shrink)
+            else:
+                interval = self._clamp(interval * self.grow)
+            self.intervals[location] = interval
+
+        self._push(location, now + interval)
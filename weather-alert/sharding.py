@@ -0,0 +1,284 @@
+import bisect
+import hashlib
+import json
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+import socket
+
+from log_pipeline import stop_logging
+from output import NullOutput
+from weather_alert_system import WeatherAlertSystem
+
+logger = logging.getLogger("weather_alert_system.sharding")
+
+# Config settings (with their defaults) that name files a worker writes; each shard gets its own copy
+SHARD_PATHS = [
+    ('cache', 'disk_path', ''),
+    ('bulk', 'id_cache', 'city_ids.json'),
+    ('state', 'path', 'alert_state.db'),
+    ('history', 'path', 'weather_history'),
+]
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+
+
+class HashRing:
+    """Consistent hash ring mapping locations to shards; adding a shard moves only about 1/N of the locations."""
+
+    def __init__(self, shards, virtual_nodes=100):
+        """Place each shard on the ring virtual_nodes times to even out the split."""
+        if not shards:
+            raise ValueError("A hash ring needs at least one shard")
+        self.shards = list(shards)
+        points = sorted((_hash(f"{shard}#{i}"), shard) for shard in self.shards for i in range(virtual_nodes))
+        self._hashes = [point for point, _ in points]
+        self._owners = [shard for _, shard in points]
+
+    def shard_for(self, location):
+        """Return the shard that owns a location."""
+        index = bisect.bisect(self._hashes, _hash(location)) % len(self._hashes)
+        return self._owners[index]
+
+    def partition(self, locations, key=None):
+        """Split locations into {shard: [locations]}, keeping their original order within each shard.
+
+        key maps a location to the value hashed onto the ring (the location itself by default).
+        """
+        partitions = {shard: [] for shard in self.shards}
+        for location in locations:
+            partitions[self.shard_for(key(location) if key else location)].append(location)
+        return partitions
+
+
+def load_shard_map(path):
+    """Read a static shard map shared by several hosts: {"hosts": {"host-a": 4, "host-b": 2}}.
+
+    Returns {host: [shard names]}; shard names are "<host>/<n>".
+    """
+    with open(path, 'r') as f:
+        hosts = json.load(f)['hosts']
+    return {host: [f"{host}/{i}" for i in range(int(workers))] for host, workers in sorted(hosts.items())}
+
+
+class ForwardingOutput:
+    """Output writer used in workers; sends display records to the coordinator's output."""
+
+    def __init__(self, events):
+        self.events = events
+
+    def location(self, location, weather_data, alerts):
+        self.events.put(('location', location, weather_data, alerts))
+
+    def forecast(self, location, alerts):
+        self.events.put(('forecast', location, alerts))
+
+    def end_cycle(self):
+        pass
+
+
+class ShardWorkerSystem(WeatherAlertSystem):
+    """Alert system for one shard, running in a worker process.
+
+    It fetches and evaluates its own locations. Display records, notifications and metrics are sent
+    to the coordinator, and per-location files get a shard suffix so workers never share them.
+    """
+
+    def __init__(self, config_file, shard, ring, events, forward_output=True):
+        self.shard = shard
+        self.ring = ring
+        self.events = events
+        super().__init__(config_file)
+        self.locations = self._owned_locations(self.locations)
+        if forward_output:
+            self.output = ForwardingOutput(events)
+
+    def _load_config(self, config_file):
+        config = super()._load_config(config_file)
+        suffix = '.' + self.shard.replace('/', '-')
+        for section, key, default in SHARD_PATHS:
+            path = config.get(section, key, fallback=default)
+            if path:
+                if not config.has_section(section):
+                    config.add_section(section)
+                config.set(section, key, path + suffix)
+        # The coordinator owns the log file, notification sinks and the metrics endpoint
+        for section, key, value in [('logging', 'path', ''), ('logging', 'console', 'false'),
+                                    ('email', 'enabled', 'false'), ('webhook', 'enabled', 'false'),
+                                    ('alert_file', 'enabled', 'false'), ('syslog', 'enabled', 'false'),
+                                    ('metrics', 'port', '0'), ('metrics', 'jsonl_path', '')]:
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, key, value)
+        return config
+
+    def _owned_locations(self, locations):
+        return [location for location in locations if self.ring.shard_for(self.shard_key(location)) == self.shard]
+
+    def send_notifications(self, location, alerts):
+        if alerts:
+            self.events.put(('notify', location, alerts))
+
+    def _end_cycle(self):
+        super()._end_cycle()
+        self.events.put(('cycle', self.shard, self.metrics.state()))
+
+
+def _run_worker(config_file, shard, options, events, log_queue):
+    """Worker process entry point: poll this shard's locations until stopped (or once)."""
+    # Log records go to the coordinator, which writes them to the shared log
+    logging.getLogger().addHandler(logging.handlers.QueueHandler(log_queue))
+    try:
+        ring = HashRing(options['shards'], options['virtual_nodes'])
+        system = ShardWorkerSystem(config_file, shard, ring, events, forward_output=options['forward_output'])
+        stop_logging()
+        if options['forecast']:
+            system.forecast_alerts_enabled = True
+        logger.info("Shard %s handling %s locations", shard, len(system.locations))
+        if options['once']:
+            try:
+                system.check_locations()
+            finally:
+                system.close()
+        else:
+            system.run_continuous(interval=options['interval'])
+    except KeyboardInterrupt:
+        pass
+    except Exception as e:
+        logger.error("Shard %s failed: %s", shard, e)
+    finally:
+        events.put(('done', shard))
+
+
+class _RelayHandler(logging.Handler):
+    """Hands log records received from workers to the coordinator's own logging setup."""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+class ShardCoordinator(WeatherAlertSystem):
+    """Splits the location list across worker processes and merges their alerts and metrics into one sink.
+
+    With a shard map, each host runs a coordinator for its own shards; the ring is built from the
+    shards of every host, so all hosts agree on who owns each location.
+    """
+
+    def _load_config(self, config_file):
+        config = super()._load_config(config_file)
+        # Workers do the fetching; the coordinator keeps no caches or state of its own
+        for section, key, value in [('cache', 'enabled', 'false'), ('state', 'enabled', 'false'),
+                                    ('history', 'enabled', 'false'), ('bulk', 'id_cache', '')]:
+            if not config.has_section(section):
+                config.add_section(section)
+            config.set(section, key, value)
+        return config
+
+    def shard_ring(self, workers=1, shard_map=None, host=None):
+        """Return the hash ring over every shard and the list of shards this host runs."""
+        virtual_nodes = self.config.getint('sharding', 'virtual_nodes', fallback=100)
+        if shard_map:
+            shards_by_host = load_shard_map(shard_map)
+            host = host or socket.gethostname()
+            if host not in shards_by_host:
+                raise ValueError(f"Host '{host}' is not listed in shard map {shard_map}")
+            ring = HashRing([shard for shards in shards_by_host.values() for shard in shards], virtual_nodes)
+            local = shards_by_host[host]
+        else:
+            ring = HashRing([f"local/{i}" for i in range(max(1, workers))], virtual_nodes)
+            local = ring.shards
+        return ring, local
+
+    def run_sharded(self, config_file, workers=1, shard_map=None, host=None, interval=3600, once=False):
+        """Start one worker process per local shard and merge what they send until they all finish."""
+        ring, local = self.shard_ring(workers, shard_map, host)
+        partitions = ring.partition(self.locations, key=self.shard_key)
+        logger.info("Coordinating %s shards: %s",
+                    len(local), ', '.join(f"{shard}={len(partitions[shard])}" for shard in local))
+
+        context = multiprocessing.get_context('spawn')
+        events = context.Queue()
+        log_queue = context.Queue()
+        log_relay = logging.handlers.QueueListener(log_queue, _RelayHandler())
+        log_relay.start()
+        options = {
+            'once': once,
+            'interval': interval,
+            'forecast': self.forecast_alerts_enabled,
+            'forward_output': not isinstance(self.output, NullOutput),
+            'shards': ring.shards,
+            'virtual_nodes': self.config.getint('sharding', 'virtual_nodes', fallback=100),
+        }
+        processes = {}
+        # Every local shard gets a worker, even an empty one, since a config reload may give it locations
+        for shard in local:
+            process = context.Process(
+                target=_run_worker, name=f"shard-{shard}", args=(config_file, shard, options, events, log_queue)
+            )
+            process.start()
+            processes[shard] = process
+
+        self._cycles = {shard: 0 for shard in processes}
+        self._states = {}
+        self._rounds = 0
+        self._pending = False
+        running = set(processes)
+        try:
+            while running:
+                try:
+                    event = events.get(timeout=1)
+                except queue.Empty:
+                    for shard in list(running):
+                        if not processes[shard].is_alive():
+                            logger.error("Shard %s exited unexpectedly", shard)
+                            running.discard(shard)
+                    continue
+                except KeyboardInterrupt:
+                    # Workers get the same interrupt; keep draining until each has closed down
+                    logger.info("Stopping shard workers")
+                    continue
+                if event[0] == 'done':
+                    running.discard(event[1])
+                else:
+                    self._handle_event(event, running)
+        finally:
+            for process in processes.values():
+                process.join(timeout=5)
+                if process.is_alive():
+                    process.terminate()
+            if self._pending:
+                self._end_round()
+            log_relay.stop()
+            self.close()
+
+    def _handle_event(self, event, running):
+        kind = event[0]
+        if kind == 'location':
+            self.output.location(*event[1:])
+            self._pending = True
+        elif kind == 'forecast':
+            self.output.forecast(*event[1:])
+            self._pending = True
+        elif kind == 'notify':
+            self.send_notifications(*event[1:])
+            self._pending = True
+        elif kind == 'cycle':
+            _, shard, state = event
+            self._states[shard] = state
+            self._cycles[shard] += 1
+            self.metrics.merge(self._states.values())
+            # A round ends once every running shard has finished another cycle
+            if min(self._cycles[name] for name in running or self._cycles) > self._rounds:
+                self._rounds += 1
+                self._end_round()
+
+    def _end_round(self):
+        """Flush the merged output, notifications and metrics snapshot after every shard has run a cycle."""
+        self._pending = False
+        self.output.end_cycle()
+        self.notifier.end_cycle()
+        if self.metrics_jsonl:
+            self.metrics.dump_jsonl(self.metrics_jsonl)
@@ -0,0 +1,78 @@
+import atexit
+import builtins
+import sys
+import threading
+import time
+
+_original_import = builtins.__import__
+_local = threading.local()
+_started = None
+# (module, self seconds, cumulative seconds, depth) for every module loaded after install()
+_imports = []
+# (label, perf_counter) for the startup phases marked so far
+_marks = []
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        # Already loaded (or relative, which this project does not use): nothing worth timing
+        return _original_import(name, globals, locals, fromlist, level)
+    stack = _local.__dict__.setdefault('stack', [])
+    # Each frame collects the cumulative time of the imports made while it runs
+    stack.append(0.0)
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        elapsed = time.perf_counter() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        _imports.append((name, elapsed - children, elapsed, len(stack)))
+
+
+def install():
+    """Start timing imports; the breakdown is printed to stderr when the process exits."""
+    global _started
+    if _started is not None:
+        return
+    _started = time.perf_counter()
+    builtins.__import__ = _timed_import
+    atexit.register(report)
+
+
+def mark(label):
+    """Record the end of a startup phase (no-op unless install() was called)."""
+    if _started is not None:
+        _marks.append((label, time.perf_counter()))
+
+
+def report(stream=None, top=15):
+    """Print the phase timings, the slowest top-level imports and the slowest modules by self time."""
+    stream = stream or sys.stderr
+    ms = 1000
+    lines = ["Startup profile (times in ms)"]
+    previous = _started
+    for label, at in _marks + [('exit', time.perf_counter())]:
+        lines.append(f"  {label:<28}{(at - previous) * ms:9.1f}  (at {(at - _started) * ms:.1f})")
+        previous = at
+
+    # Threads importing a module another thread is loading wait for it and get recorded after it;
+    # only the first record of each module is the one that actually loaded it
+    imports, seen = [], set()
+    for entry in _imports:
+        if entry[0] not in seen:
+            seen.add(entry[0])
+            imports.append(entry)
+
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0)
+    lines.append(f"Imports: {len(imports)} modules, {total * ms:.1f} ms")
+    lines.append(f"  {'cumulative':>10} {'self':>8}  module (imported directly)")
+    direct = sorted((entry for entry in imports if entry[3] == 0), key=lambda entry: entry[2], reverse=True)
+    for name, own, cumulative, _ in direct[:top]:
+        lines.append(f"  {cumulative * ms:10.1f} {own * ms:8.1f}  {name}")
+    lines.append(f"  {'self':>10} {'':>8}  module (any depth)")
+    for name, own, _, _ in sorted(imports, key=lambda entry: entry[1], reverse=True)[:top]:
+        lines.append(f"  {own * ms:10.1f} {'':>8}  {name}")
+    stream.write('\n'.join(lines) + '\n')
+    stream.flush()
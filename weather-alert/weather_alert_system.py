@@ -1,78 +1,289 @@
-import requests
+import sys
 import time
+
+# Installed before anything else is imported so --startup-profile can time every import
+startup_profile = None
+if '--startup-profile' in sys.argv:
+    import startup_profile
+    startup_profile.install()
+
 import json
 import os
 from datetime import datetime
-import smtplib
-from email.message import EmailMessage
 import argparse
 import logging
-from configparser import ConfigParser
-from tabulate import tabulate
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler("weather_alerts.log"),
-        logging.StreamHandler()
-    ]
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from response_cache import ResponseCache
+from city_index import CityIndex
+from notifications import NotificationRouter, WebhookSink, JsonLinesSink, SyslogSink, DryRunSink
+from alert_state import AlertStateStore
+from observation_history import ObservationHistory
+from scheduler import AdaptiveScheduler
+from metrics import Metrics
+from capture import CaptureWriter, read_capture
+from output import OUTPUT_FORMATS, create_output
+from geotiles import TileIndex, geohash_center, parse_points
+from log_pipeline import buffer_early_logging, configure_logging
+from config_snapshot import WeatherConfig, load_snapshot, save_snapshot, remove_snapshot
+from resilience import RETRYABLE_STATUS, TokenBucket, CircuitBreaker, parse_retry_after, backoff_delay
+import alert_engine
+from alert_rules import RULE_SECTION_PREFIX, load_rules, rule_sections
+from alert_engine import (
+    HEAVY_RAIN_MM, unit_labels, heat_alert, freeze_alert, wind_alert,
+    thunderstorm_alert, heavy_rain_alert, forecast_alerts, observation_fingerprint, BatchAlertEvaluator
 )
+
 logger = logging.getLogger("weather_alert_system")
+# Per-location debug records; only emitted for locations listed in [logging] debug_locations
+location_logger = logging.getLogger("weather_alert_system.location")
+
+# Maximum number of city IDs accepted by the OpenWeatherMap group endpoint
+MAX_GROUP_SIZE = 20
+
+# A config file modified more recently than this may still be being written; reload it on a later check
+CONFIG_SETTLE_SECONDS = 2
+
+# Settings applied by reload_config while running (None means the whole section); others need a restart
+RELOADABLE_SETTINGS = {
+    'locations': None,
+    'alerts': {'temp_high', 'temp_low', 'wind_speed', 'rain_probability', 'forecast'},
+    'logging': {'debug_locations'},
+    'state': {'cooldown'},
+    'preferences': {'reload_config'},
+}
 
 class WeatherAlertSystem:
     """Weather Alert System that fetches data and generates alerts based on weather conditions."""
     
     def __init__(self, config_file='config.ini'):
         """Initialize the weather alert system with configuration."""
+        self.config_file = config_file
+        # Messages from loading the config are held until the [logging] settings it contains are applied
+        buffer_early_logging()
         self.config = self._load_config(config_file)
+        _startup_mark('config loaded')
+        self._config_mtime = os.stat(config_file).st_mtime_ns
+        self.reload_enabled = self.config.getboolean('preferences', 'reload_config', fallback=True)
+        configure_logging(
+            path=self.config.get('logging', 'path', fallback='weather_alerts.log'),
+            level=self.config.get('logging', 'level', fallback='INFO'),
+            max_bytes=self.config.getint('logging', 'max_bytes', fallback=10485760),
+            backup_count=self.config.getint('logging', 'backup_count', fallback=5),
+            rotate_when=self.config.get('logging', 'rotate_when', fallback=''),
+            console=self.config.getboolean('logging', 'console', fallback=True)
+        )
+        self.debug_locations = frozenset(self.config.getjson('logging', 'debug_locations', fallback='[]'))
+        location_logger.setLevel(logging.DEBUG if self.debug_locations else logging.NOTSET)
         self.api_key = self.config.get('api', 'key', fallback=os.environ.get('WEATHER_API_KEY'))
         self.base_url = self.config.get('api', 'base_url', fallback='https://api.openweathermap.org/data/2.5')
         self.units = self.config.get('preferences', 'units', fallback='imperial')
-        self.locations = json.loads(self.config.get('locations', 'cities', fallback='["New York", "Los Angeles", "Chicago"]'))
-        self.alert_thresholds = {
-            'temp_high': float(self.config.get('alerts', 'temp_high', fallback=95)),
-            'temp_low': float(self.config.get('alerts', 'temp_low', fallback=32)),
-            'wind_speed': float(self.config.get('alerts', 'wind_speed', fallback=20)),
-            'rain_probability': float(self.config.get('alerts', 'rain_probability', fallback=70)),
-        }
+        self.locations, self.points = self._read_locations(self.config)
+        self.tile_index = TileIndex(self.points, precision=self.config.getint('tiles', 'precision', fallback=5))
+        self.alert_thresholds = self._read_thresholds(self.config)
+        self.forecast_alerts_enabled = self.config.getboolean('alerts', 'forecast', fallback=False)
+        self.vectorized_alerts = self.config.getboolean('alerts', 'vectorized', fallback=False)
+        self.vectorized_batch_size = max(1, self.config.getint('alerts', 'vectorized_batch_size', fallback=500))
+        if self.vectorized_alerts and alert_engine.load_numpy() is None:
+            logger.warning("numpy is not installed; falling back to per-location alert evaluation")
+            self.vectorized_alerts = False
+        self.alert_evaluator = BatchAlertEvaluator(self.alert_thresholds, self.units) if self.vectorized_alerts else None
+        self.rules = load_rules(self.config, self.alert_thresholds, self.units)
+        if self.rules:
+            logger.info("Loaded %s alert rules", len(self.rules))
+        self.skip_unchanged = self.config.getboolean('preferences', 'skip_unchanged', fallback=True)
+        # location -> (fingerprint, alerts) of the last observation processed
+        self._fingerprints = {}
         self.email_config = {
             'enabled': self.config.getboolean('email', 'enabled', fallback=False),
             'sender': self.config.get('email', 'sender', fallback=''),
-            'recipients': json.loads(self.config.get('email', 'recipients', fallback='[]')),
+            'recipients': self.config.getjson('email', 'recipients', fallback='[]'),
             'smtp_server': self.config.get('email', 'smtp_server', fallback='smtp.gmail.com'),
             'smtp_port': self.config.getint('email', 'smtp_port', fallback=587),
             'username': self.config.get('email', 'username', fallback=''),
-            'password': self.config.get('email', 'password', fallback='')
+            'password': self.config.get('email', 'password', fallback=''),
+            'use_tls': self.config.getboolean('email', 'use_tls', fallback=True),
+            'digest': self.config.getboolean('email', 'digest', fallback=False)
         }
+        self.output = create_output(
+            self.config.get('preferences', 'output_format', fallback='table'), self.format_weather_display
+        )
+        self.metrics = Metrics()
+        self.metrics_jsonl = self.config.get('metrics', 'jsonl_path', fallback='')
+        self.profile_path = None
+        self.capture = None
+        # Latest results served by the query API; only kept in server mode
+        self.observations = None
+        self.max_concurrency = max(1, self.config.getint('network', 'max_concurrency', fallback=8))
+        self.request_timeout = self.config.getfloat('network', 'timeout', fallback=10)
+        self.max_retries = max(0, self.config.getint('network', 'max_retries', fallback=3))
+        self.backoff_base = self.config.getfloat('network', 'backoff_base', fallback=1.0)
+        self.backoff_max = self.config.getfloat('network', 'backoff_max', fallback=60.0)
+        self.rate_limiter = TokenBucket(
+            self.config.getfloat('network', 'rate_limit', fallback=60),
+            burst=self.config.getint('network', 'burst', fallback=10)
+        )
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=self.config.getint('network', 'breaker_threshold', fallback=5),
+            reset_timeout=self.config.getfloat('network', 'breaker_reset', fallback=60)
+        )
+        # Created on first use: a run served entirely from the disk cache never loads requests
+        self._session = None
+        self._session_lock = threading.Lock()
+        self.cache = ResponseCache(
+            max_entries=self.config.getint('cache', 'max_entries', fallback=5000),
+            ttls={
+                'weather': self.config.getint('cache', 'weather_ttl', fallback=600),
+                'forecast': self.config.getint('cache', 'forecast_ttl', fallback=3600),
+            },
+            disk_path=self.config.get('cache', 'disk_path', fallback=''),
+            enabled=self.config.getboolean('cache', 'enabled', fallback=True)
+        )
+        self.notifier = NotificationRouter(self._create_sinks())
+        self.notifier.start()
+        self.alert_state = None
+        if self.config.getboolean('state', 'enabled', fallback=True):
+            self.alert_state = AlertStateStore(
+                self.config.get('state', 'path', fallback='alert_state.db'),
+                cooldown=self.config.getint('state', 'cooldown', fallback=21600),
+                all_clear=self.config.getboolean('state', 'all_clear', fallback=True)
+            )
+        self.history = None
+        if self.config.getboolean('history', 'enabled', fallback=False):
+            self.history = ObservationHistory(self.config.get('history', 'path', fallback='weather_history'))
+        self.adaptive_schedule = self.config.getboolean('schedule', 'adaptive', fallback=False)
+        self.bulk_enabled = self.config.getboolean('bulk', 'enabled', fallback=False)
+        self.batch_size = min(MAX_GROUP_SIZE, max(1, self.config.getint('bulk', 'batch_size', fallback=MAX_GROUP_SIZE)))
+        self.city_index = CityIndex(self.config.get('bulk', 'id_cache', fallback='city_ids.json'))
+        
+        self._register_metric_collectors()
+        metrics_port = self.config.getint('metrics', 'port', fallback=0)
+        if metrics_port:
+            self.metrics.serve(metrics_port)
         
         if not self.api_key:
             logger.error("API key not found. Please set it in config.ini or as WEATHER_API_KEY environment variable.")
             raise ValueError("API key is required")
             
     def _load_config(self, config_file):
-        """Load configuration from INI file or create default if not exists."""
-        config = ConfigParser()
+        """Load configuration from INI file or create default if not exists.
+        
+        A snapshot of the parsed file is reused while the file's mtime and size are unchanged.
+        """
+        config = load_snapshot(config_file)
+        if config is not None:
+            return config
+        
+        config = WeatherConfig()
         
         if not os.path.exists(config_file):
-            logger.info(f"Config file {config_file} not found. Creating with default settings.")
+            logger.info("Config file %s not found. Creating with default settings.", config_file)
             config['api'] = {
                 'key': '',
                 'base_url': 'https://api.openweathermap.org/data/2.5'
             }
             config['preferences'] = {
                 'units': 'imperial',
-                'check_interval': '3600'
+                'check_interval': '3600',
+                'output_format': 'table',
+                'reload_config': 'true',
+                'skip_unchanged': 'true',
+                'config_snapshot': 'true'
             }
             config['locations'] = {
-                'cities': '["New York", "Los Angeles", "Chicago"]'
+                'cities': '["New York", "Los Angeles", "Chicago"]',
+                'points': '{}'
+            }
+            config['tiles'] = {
+                'precision': '5'
             }
             config['alerts'] = {
                 'temp_high': '95',
                 'temp_low': '32',
                 'wind_speed': '20',
-                'rain_probability': '70'
+                'rain_probability': '70',
+                'forecast': 'false',
+                'vectorized': 'false',
+                'vectorized_batch_size': '500'
+            }
+            config['logging'] = {
+                'path': 'weather_alerts.log',
+                'level': 'INFO',
+                'max_bytes': '10485760',
+                'backup_count': '5',
+                'rotate_when': '',
+                'console': 'true',
+                'debug_locations': '[]'
+            }
+            config['network'] = {
+                'max_concurrency': '8',
+                'timeout': '10',
+                'rate_limit': '60',
+                'burst': '10',
+                'max_retries': '3',
+                'backoff_base': '1',
+                'backoff_max': '60',
+                'breaker_threshold': '5',
+                'breaker_reset': '60'
+            }
+            config['cache'] = {
+                'enabled': 'true',
+                'max_entries': '5000',
+                'weather_ttl': '600',
+                'forecast_ttl': '3600',
+                'disk_path': 'weather_cache.json'
+            }
+            config['bulk'] = {
+                'enabled': 'false',
+                'batch_size': '20',
+                'id_cache': 'city_ids.json'
+            }
+            config['state'] = {
+                'enabled': 'true',
+                'path': 'alert_state.db',
+                'cooldown': '21600',
+                'all_clear': 'true'
+            }
+            config['history'] = {
+                'enabled': 'false',
+                'path': 'weather_history'
+            }
+            config['schedule'] = {
+                'adaptive': 'false',
+                'min_interval': '300',
+                'max_interval': '3600',
+                'requests_per_minute': '60',
+                'change_threshold': '5'
+            }
+            config['metrics'] = {
+                'port': '0',
+                'jsonl_path': ''
+            }
+            config['server'] = {
+                'host': '127.0.0.1',
+                'port': '8088',
+                'read_through': 'true'
+            }
+            config['sharding'] = {
+                'virtual_nodes': '100'
+            }
+            config['webhook'] = {
+                'enabled': 'false',
+                'url': 'http://127.0.0.1:8090/alerts',
+                'timeout': '10',
+                'batch_size': '50',
+                'queue_size': '1000',
+                'max_retries': '3',
+                'policy': 'drop_newest'
+            }
+            config['alert_file'] = {
+                'enabled': 'false',
+                'path': 'alerts.jsonl'
+            }
+            config['syslog'] = {
+                'enabled': 'false',
+                'address': '/dev/log',
+                'facility': 'user'
             }
             config['email'] = {
                 'enabled': 'false',
@@ -81,46 +292,408 @@ class WeatherAlertSystem:
                 'smtp_server': 'smtp.gmail.com',
                 'smtp_port': '587',
                 'username': 'your_email@gmail.com',
-                'password': 'your_app_password'
+                'password': 'your_app_password',
+                'use_tls': 'true',
+                'digest': 'false',
+                'batch_size': '50',
+                'queue_size': '100',
+                'max_retries': '3',
+                'policy': 'drop_newest'
             }
             
             with open(config_file, 'w') as f:
                 config.write(f)
                 
         config.read(config_file)
+        if config.getboolean('preferences', 'config_snapshot', fallback=True):
+            save_snapshot(config, config_file)
+        else:
+            remove_snapshot(config_file)
         return config
 
+    @staticmethod
+    def _read_locations(config):
+        """Return the monitored location names (cities, then coordinate points) and the points' coordinates."""
+        cities = config.getjson('locations', 'cities', fallback='["New York", "Los Angeles", "Chicago"]')
+        if not isinstance(cities, list):
+            raise ValueError("[locations] cities must be a JSON list")
+        points = parse_points(config.getjson('locations', 'points', fallback='{}'))
+        return cities + [name for name in points if name not in cities], points
+
+    @staticmethod
+    def _read_thresholds(config):
+        return {
+            'temp_high': float(config.get('alerts', 'temp_high', fallback=95)),
+            'temp_low': float(config.get('alerts', 'temp_low', fallback=32)),
+            'wind_speed': float(config.get('alerts', 'wind_speed', fallback=20)),
+            'rain_probability': float(config.get('alerts', 'rain_probability', fallback=70)),
+        }
+
+    def _owned_locations(self, locations):
+        """Return the locations from the config that this process monitors."""
+        return locations
+
+    def reload_config(self):
+        """Apply changes to the config file made since the last check; returns (added, removed) locations.
+        
+        The whole file is parsed and validated before anything is applied, so a half-written or
+        invalid file leaves the running settings untouched.
+        """
+        try:
+            stat = os.stat(self.config_file)
+        except OSError:
+            return [], []
+        if stat.st_mtime_ns == self._config_mtime or time.time() - stat.st_mtime < CONFIG_SETTLE_SECONDS:
+            return [], []
+        self._config_mtime = stat.st_mtime_ns
+        
+        old = self.config
+        try:
+            config = self._load_config(self.config_file)
+            missing = [
+                section for section in old.sections()
+                if not config.has_section(section) and not section.startswith(RULE_SECTION_PREFIX)
+            ]
+            if missing:
+                raise ValueError(f"missing sections {', '.join(missing)}")
+            locations, points = self._read_locations(config)
+            thresholds = self._read_thresholds(config)
+            rules = load_rules(config, thresholds, self.units)
+            forecast = config.getboolean('alerts', 'forecast', fallback=False)
+            debug_locations = frozenset(config.getjson('logging', 'debug_locations', fallback='[]'))
+            cooldown = config.getint('state', 'cooldown', fallback=21600)
+            reload_enabled = config.getboolean('preferences', 'reload_config', fallback=True)
+        except Exception as e:
+            logger.error("Ignoring changes to %s, keeping the running settings: %s", self.config_file, e)
+            return [], []
+        
+        self.points = points
+        self.tile_index = TileIndex(points, precision=self.tile_index.precision)
+        locations = self._owned_locations(locations)
+        current = set(self.locations)
+        added = [location for location in locations if location not in current]
+        wanted = set(locations)
+        removed = [location for location in self.locations if location not in wanted]
+        for location in removed:
+            self.cache.invalidate(location)
+            self.city_index.discard(location)
+            if self.alert_state is not None:
+                self.alert_state.forget(location)
+            self._fingerprints.pop(location, None)
+            if self.observations is not None:
+                self.observations.discard(location)
+        
+        self.config = config
+        self.locations = locations
+        if thresholds != self.alert_thresholds:
+            self.alert_thresholds = thresholds
+            # Unchanged observations must be re-evaluated against the new thresholds
+            self._fingerprints.clear()
+            if self.alert_evaluator is not None:
+                self.alert_evaluator = BatchAlertEvaluator(thresholds, self.units)
+        if rule_sections(config) != rule_sections(old):
+            self._fingerprints.clear()
+        self.rules = rules
+        # Only apply a flag when its config value changed, so command-line overrides survive a reload
+        if forecast != old.getboolean('alerts', 'forecast', fallback=False):
+            self.forecast_alerts_enabled = forecast
+        self.debug_locations = debug_locations
+        location_logger.setLevel(logging.DEBUG if debug_locations else logging.NOTSET)
+        if self.alert_state is not None:
+            self.alert_state.cooldown = cooldown
+        self.reload_enabled = reload_enabled
+        
+        restart_needed = self._unreloadable_changes(old, config)
+        logger.info("Reloaded %s: %s locations added, %s removed", self.config_file, len(added), len(removed))
+        if restart_needed:
+            logger.warning("Changes to %s take effect after a restart", ', '.join(restart_needed))
+        return added, removed
+
+    @staticmethod
+    def _unreloadable_changes(old, new):
+        """List the changed settings that reload_config cannot apply."""
+        changes = []
+        for section in sorted(set(old.sections()) | set(new.sections())):
+            reloadable = RELOADABLE_SETTINGS.get(section, set())
+            if reloadable is None or section.startswith(RULE_SECTION_PREFIX):
+                continue
+            keys = set(old[section]) if old.has_section(section) else set()
+            keys |= set(new[section]) if new.has_section(section) else set()
+            for key in sorted(keys - reloadable):
+                if old.get(section, key, fallback=None) != new.get(section, key, fallback=None):
+                    changes.append(f"[{section}] {key}")
+        return changes
+
+    def _sink_options(self, section, queue_size=1000):
+        """Queue, batching, retry and shed settings shared by every notification sink section."""
+        return {
+            'queue_size': self.config.getint(section, 'queue_size', fallback=queue_size),
+            'batch_size': self.config.getint(section, 'batch_size', fallback=50),
+            'batch_interval': self.config.getfloat(section, 'batch_interval', fallback=1.0),
+            'max_retries': self.config.getint(section, 'max_retries', fallback=3),
+            'policy': self.config.get(section, 'policy', fallback='drop_newest'),
+        }
+
+    def _create_sinks(self):
+        """Build the notification sinks enabled in the config, keyed by name."""
+        sinks = {}
+        if self.email_config['enabled']:
+            # smtplib and email are only loaded when email notifications are on
+            from mail_dispatcher import EmailSink
+            sinks['email'] = EmailSink(
+                self.email_config['smtp_server'],
+                self.email_config['smtp_port'],
+                self.email_config['sender'],
+                self.email_config['recipients'],
+                username=self.email_config['username'],
+                password=self.email_config['password'],
+                use_tls=self.email_config['use_tls'],
+                digest=self.email_config['digest'],
+                **self._sink_options('email', queue_size=100)
+            )
+        if self.config.getboolean('webhook', 'enabled', fallback=False):
+            sinks['webhook'] = WebhookSink(
+                self.config.get('webhook', 'url'),
+                timeout=self.config.getfloat('webhook', 'timeout', fallback=10),
+                **self._sink_options('webhook')
+            )
+        if self.config.getboolean('alert_file', 'enabled', fallback=False):
+            sinks['file'] = JsonLinesSink(
+                self.config.get('alert_file', 'path', fallback='alerts.jsonl'),
+                **self._sink_options('alert_file')
+            )
+        if self.config.getboolean('syslog', 'enabled', fallback=False):
+            try:
+                sinks['syslog'] = SyslogSink(
+                    self.config.get('syslog', 'address', fallback='/dev/log'),
+                    facility=self.config.get('syslog', 'facility', fallback='user'),
+                    **self._sink_options('syslog')
+                )
+            except OSError as e:
+                logger.error("Syslog notifications disabled: %s", e)
+        return sinks
+
+    def _register_metric_collectors(self):
+        """Expose component counters (cache, mail, alert state) as gauges read at export time."""
+        self.metrics.add_collector(lambda: [
+            ('weather_cache_events', {'event': event}, count) for event, count in self.cache.stats.items()
+        ])
+        self.metrics.add_collector(lambda: [
+            ('weather_circuit_open', {}, int(self.circuit_breaker.state != 'closed'))
+        ])
+        if self.notifier:
+            self.metrics.add_collector(lambda: [
+                ('weather_notifications', {'sink': sink, 'result': result}, count)
+                for sink, result, count in self.notifier.collect_stats()
+            ])
+        if self.alert_state is not None:
+            self.metrics.add_collector(lambda: [
+                ('weather_alert_notifications', {'result': result}, count)
+                for result, count in self.alert_state.stats.items()
+            ])
+
+    @property
+    def session(self):
+        """The shared HTTP session, created the first time a request is made."""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    def _create_session(self):
+        """Create a shared HTTP session with a connection pool sized for the worker threads."""
+        import requests
+        from requests.adapters import HTTPAdapter
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_concurrency)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _request(self, endpoint, params, description):
+        """Call an API endpoint and return the decoded JSON, or None on failure.
+        
+        Requests are rate limited, retried with backoff on throttling and server errors,
+        and skipped entirely while the circuit breaker is open.
+        """
+        import requests
+        
+        url = f"{self.base_url}/{endpoint}"
+        params = dict(params, appid=self.api_key, units=self.units)
+        
+        for attempt in range(self.max_retries + 1):
+            if not self.circuit_breaker.allow():
+                self.metrics.inc('weather_requests_skipped_total', endpoint=endpoint)
+                logger.warning("Skipping %s: upstream circuit breaker is open", description)
+                return None
+            
+            self.rate_limiter.acquire()
+            retry_after = None
+            try:
+                with self.metrics.timer('weather_fetch_seconds', endpoint=endpoint):
+                    response = self.session.get(url, params=params, timeout=self.request_timeout)
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    self.circuit_breaker.record_success()
+                    return response.json()
+                error = f"HTTP {response.status_code}"
+                self.metrics.inc('weather_http_errors_total', endpoint=endpoint, status=response.status_code)
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            except requests.exceptions.HTTPError as e:
+                # Other 4xx errors (e.g. unknown city) are not worth retrying and say nothing about upstream health
+                self.circuit_breaker.record_success()
+                self.metrics.inc('weather_http_errors_total', endpoint=endpoint, status=e.response.status_code)
+                logger.error("Error fetching %s: %s", description, e)
+                return None
+            except requests.exceptions.RequestException as e:
+                error = e
+                self.metrics.inc('weather_http_errors_total', endpoint=endpoint, status='connection')
+            
+            self.circuit_breaker.record_failure()
+            if attempt == self.max_retries:
+                break
+            delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+            logger.warning("Error fetching %s: %s; retrying in %.1f seconds", description, error, delay)
+            time.sleep(delay)
+        
+        logger.error("Error fetching %s: %s", description, error)
+        return None
+
+    def _api_get(self, endpoint, location, description):
+        """Fetch an API endpoint for a location, serving fresh responses from the cache."""
+        cached = self.cache.get(endpoint, location, self.units)
+        if cached is not None:
+            if self.debug_locations and location in self.debug_locations:
+                location_logger.debug("%s: %s served from cache", location, endpoint)
+            return cached
+        
+        data = self._request(endpoint, {'q': location}, f"{description} for {location}")
+        if self.debug_locations and location in self.debug_locations:
+            location_logger.debug("%s: fetched %s: %s", location, endpoint, json.dumps(data))
+        self.cache.put(endpoint, location, self.units, data)
+        return data
+
     def get_current_weather(self, location):
         """Fetch current weather data for a location."""
-        try:
-            url = f"{self.base_url}/weather"
-            params = {
-                'q': location,
-                'appid': self.api_key,
-                'units': self.units
-            }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching weather data for {location}: {e}")
-            return None
+        tile = self.tile_index.tile_for(location)
+        if tile is not None:
+            return self.get_tile_data('weather', tile)
+        return self._api_get('weather', location, 'weather data')
 
     def get_forecast(self, location):
         """Fetch 5-day forecast for a location."""
-        try:
-            url = f"{self.base_url}/forecast"
-            params = {
-                'q': location,
-                'appid': self.api_key,
-                'units': self.units
-            }
-            response = requests.get(url, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Error fetching forecast data for {location}: {e}")
+        tile = self.tile_index.tile_for(location)
+        if tile is not None:
+            return self.get_tile_data('forecast', tile)
+        return self._api_get('forecast', location, 'forecast data')
+
+    def get_tile_data(self, endpoint, tile):
+        """Fetch an endpoint once for a geohash tile, at the tile's centre."""
+        key = f"tile:{tile}"
+        cached = self.cache.get(endpoint, key, self.units)
+        if cached is not None:
+            return cached
+        
+        lat, lon = geohash_center(tile)
+        data = self._request(endpoint, {'lat': f"{lat:.4f}", 'lon': f"{lon:.4f}"}, f"{endpoint} data for tile {tile}")
+        self.cache.put(endpoint, key, self.units, data)
+        return data
+
+    def shard_key(self, location):
+        """Key used to assign a location to a shard; all points in a tile share one so the tile is fetched once."""
+        tile = self.tile_index.tile_for(location)
+        return location if tile is None else f"tile:{tile}"
+
+    def get_group_weather(self, city_ids):
+        """Fetch current weather for several city IDs in one request to the group endpoint."""
+        data = self._request(
+            'group',
+            {'id': ','.join(str(city_id) for city_id in city_ids)},
+            f"group weather data for {len(city_ids)} cities"
+        )
+        if data is None:
             return None
+        return data.get('list', [])
+
+    def _resolve_location(self, location):
+        """Fetch a location individually and remember its city ID for later group requests."""
+        weather_data = self.get_current_weather(location)
+        self.city_index.record(location, weather_data)
+        return weather_data
+
+    def _iter_tiles(self, endpoint, locations):
+        """Fetch the coordinate points among locations once per tile, yielding (location, data) for each point."""
+        tiles = self.tile_index.group(location for location in locations if location in self.tile_index)
+        for tile, data in self.fetch_all(lambda tile: self.get_tile_data(endpoint, tile), tiles):
+            for location in tiles[tile]:
+                yield location, data
+
+    def _recorded(self, endpoint, results):
+        """Pass (location, data) pairs through, adding each to the capture when recording.
+        
+        Recording here, where a cycle consumes its data, captures every response the cycle processed,
+        whether it was fetched or served from the cache, so a replay sees the same cycle.
+        """
+        for location, data in results:
+            if self.capture is not None and data:
+                self.capture.record(endpoint, location, data)
+            yield location, data
+
+    def iter_forecasts(self, locations):
+        """Yield (location, forecast_data) pairs as they arrive, fetching coordinate points once per tile."""
+        yield from self._iter_tiles('forecast', locations)
+        yield from self.fetch_all(self.get_forecast, [location for location in locations if location not in self.tile_index])
+
+    def iter_current_weather(self, locations):
+        """Yield (location, weather_data) pairs as they arrive, batching by city ID when bulk mode is on.
+        
+        Coordinate points are fetched once per geohash tile and the result is given to every point in it.
+        """
+        yield from self._iter_tiles('weather', locations)
+        locations = [location for location in locations if location not in self.tile_index]
+        
+        if not self.bulk_enabled:
+            yield from self.fetch_all(self.get_current_weather, locations)
+            return
+        
+        # Names without a known city ID are fetched one by one once to learn their ID
+        unresolved = {location for location in locations if self.city_index.get(location) is None}
+        yield from self.fetch_all(self._resolve_location, unresolved)
+        
+        ids_to_locations = {}
+        for location in locations:
+            city_id = self.city_index.get(location)
+            if city_id is None or location in unresolved:
+                continue
+            cached = self.cache.get('weather', location, self.units)
+            if cached is not None:
+                yield location, cached
+            else:
+                ids_to_locations.setdefault(city_id, []).append(location)
+        
+        city_ids = list(ids_to_locations)
+        batches = [tuple(city_ids[i:i + self.batch_size]) for i in range(0, len(city_ids), self.batch_size)]
+        if batches:
+            logger.info("Fetching %s cities in %s group requests", len(city_ids), len(batches))
+        
+        for batch, results in self.fetch_all(self.get_group_weather, batches):
+            received = set()
+            for weather_data in results or []:
+                city_id = weather_data.get('id')
+                for location in ids_to_locations.get(city_id, []):
+                    self.cache.put('weather', location, self.units, weather_data)
+                    received.add(city_id)
+                    yield location, weather_data
+            
+            for city_id in batch:
+                if city_id in received:
+                    continue
+                for location in ids_to_locations[city_id]:
+                    if results is not None:
+                        # The ID is no longer valid upstream; resolve the name again next cycle
+                        self.city_index.discard(location)
+                    yield location, None
 
     def generate_alerts(self, weather_data):
         """Generate alerts based on weather conditions."""
@@ -128,33 +701,20 @@ class WeatherAlertSystem:
             return []
         
         alerts = []
-        temp_unit = "°F" if self.units == 'imperial' else "°C"
-        speed_unit = "mph" if self.units == 'imperial' else "m/s"
+        temp_unit, speed_unit = unit_labels(self.units)
         
         # Current temperature alerts
         temp = weather_data.get('main', {}).get('temp')
         if temp is not None:
             if temp > self.alert_thresholds['temp_high']:
-                alerts.append({
-                    'type': 'severe',
-                    'title': 'Extreme Heat Warning',
-                    'message': f"Temperature is {temp}{temp_unit}, which exceeds the high temperature threshold of {self.alert_thresholds['temp_high']}{temp_unit}."
-                })
+                alerts.append(heat_alert(temp, self.alert_thresholds['temp_high'], temp_unit))
             elif temp < self.alert_thresholds['temp_low']:
-                alerts.append({
-                    'type': 'severe',
-                    'title': 'Freeze Warning',
-                    'message': f"Temperature is {temp}{temp_unit}, which is below the low temperature threshold of {self.alert_thresholds['temp_low']}{temp_unit}."
-                })
+                alerts.append(freeze_alert(temp, self.alert_thresholds['temp_low'], temp_unit))
         
         # Wind speed alerts
         wind_speed = weather_data.get('wind', {}).get('speed')
         if wind_speed is not None and wind_speed > self.alert_thresholds['wind_speed']:
-            alerts.append({
-                'type': 'moderate',
-                'title': 'Wind Advisory',
-                'message': f"Wind speed is {wind_speed}{speed_unit}, which exceeds the threshold of {self.alert_thresholds['wind_speed']}{speed_unit}."
-            })
+            alerts.append(wind_alert(wind_speed, self.alert_thresholds['wind_speed'], speed_unit))
         
         # Weather condition alerts
         weather_conditions = weather_data.get('weather', [{}])
@@ -163,17 +723,13 @@ class WeatherAlertSystem:
             description = weather_conditions[0].get('description')
             
             if main_condition == 'Thunderstorm':
-                alerts.append({
-                    'type': 'severe',
-                    'title': 'Thunderstorm Warning',
-                    'message': f"Thunderstorms detected: {description}. Take necessary precautions."
-                })
-            elif main_condition == 'Rain' and weather_data.get('rain', {}).get('1h', 0) > 10:
-                alerts.append({
-                    'type': 'moderate',
-                    'title': 'Heavy Rain Alert',
-                    'message': f"Heavy rainfall detected: {description}. Be aware of potential flooding."
-                })
+                alerts.append(thunderstorm_alert(description))
+            elif main_condition == 'Rain' and weather_data.get('rain', {}).get('1h', 0) > HEAVY_RAIN_MM:
+                alerts.append(heavy_rain_alert(description))
+        
+        # Rules from the config
+        if self.rules:
+            alerts.extend(self.rules.evaluate(weather_data))
         
         return alerts
 
@@ -208,103 +764,454 @@ class WeatherAlertSystem:
                 ["Wind Speed", f"{wind_speed} {speed_unit}"]
             ]
             
+            from tabulate import tabulate
             return tabulate(table, tablefmt="pretty")
             
         except Exception as e:
-            logger.error(f"Error formatting weather data: {e}")
+            logger.error("Error formatting weather data: %s", e)
             return f"Error formatting weather data for {location}"
 
-    def send_alert_email(self, location, alerts):
-        """Send email notification for alerts."""
-        if not self.email_config['enabled'] or not alerts:
-            return
+    def send_notifications(self, location, alerts):
+        """Queue alerts for every notification sink; delivery happens on each sink's own thread."""
+        self.notifier.submit(location, alerts)
+
+    def close(self):
+        """Deliver any queued notifications and release network resources."""
+        self.notifier.stop()
+        if self.capture is not None:
+            self.capture.close()
+            self.capture = None
+        if self.alert_state is not None:
+            self.alert_state.close()
+        if self._session is not None:
+            self._session.close()
+
+    def fetch_all(self, fetch, locations):
+        """Fetch data for many locations concurrently, yielding (location, data) as each completes."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = {executor.submit(fetch, location): location for location in locations}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def alerts_to_notify(self, location, alerts, kind):
+        """Return the alerts worth sending, dropping repeats still inside the cooldown."""
+        if self.alert_state is None:
+            return alerts
+        # A forecast scan stops at its first severe step, so when one fired, conditions missing from
+        # the alerts may just lie beyond the scanned steps and have not ended
+        complete = kind != 'forecast' or not any(alert['type'] == 'severe' for alert in alerts)
+        return self.alert_state.filter_alerts(location, alerts, kind, complete=complete)
+
+    def process_location(self, location, weather_data, alerts=None):
+        """Display weather, generate alerts and send notifications for one location."""
+        if self.history is not None:
+            self.history.append(location, weather_data)
         
-        try:
-            msg = EmailMessage()
-            msg['Subject'] = f"Weather Alert: {location}"
-            msg['From'] = self.email_config['sender']
-            msg['To'] = ', '.join(self.email_config['recipients'])
-            
-            content = [f"Weather Alerts for {location} - {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n"]
-            
-            for alert in alerts:
-                content.append(f"{alert['title']} ({alert['type'].upper()})")
-                content.append(f"{alert['message']}")
-                content.append("")
-            
-            msg.set_content('\n'.join(content))
-            
-            with smtplib.SMTP(self.email_config['smtp_server'], self.email_config['smtp_port']) as server:
-                server.starttls()
-                server.login(self.email_config['username'], self.email_config['password'])
-                server.send_message(msg)
-                
-            logger.info(f"Alert email sent for {location}")
-        except Exception as e:
-            logger.error(f"Error sending email alert: {e}")
+        # Generate alerts (unless already evaluated as part of a batch)
+        if alerts is None:
+            with self.metrics.timer('weather_stage_seconds', stage='generate_alerts'):
+                alerts = self.generate_alerts(weather_data)
+        
+        # Display weather and alerts in the configured output format
+        with self.metrics.timer('weather_stage_seconds', stage='output'):
+            self.output.location(location, weather_data, alerts)
+        
+        # Send notifications for new alerts and alerts that have ended
+        with self.metrics.timer('weather_stage_seconds', stage='notify'):
+            notify = self.alerts_to_notify(location, alerts, 'current')
+            self.send_notifications(location, notify)
+        
+        if self.debug_locations and location in self.debug_locations:
+            location_logger.debug("%s: alerts %s; notified %s", location,
+                                  [alert['title'] for alert in alerts], [alert['title'] for alert in notify])
+        if self.skip_unchanged:
+            self._fingerprints[location] = (observation_fingerprint(weather_data), alerts)
+        
+        return alerts
+
+    def unchanged_alerts(self, location, weather_data):
+        """Return the alerts from the last time this observation was processed, or None if it has changed."""
+        if not self.skip_unchanged:
+            return None
+        seen = self._fingerprints.get(location)
+        if seen is not None and seen[0] == observation_fingerprint(weather_data):
+            return seen[1]
+        return None
+
+    def process_batch(self, results):
+        """Evaluate alerts for a batch of (location, weather_data) pairs at once, then process each."""
+        with self.metrics.timer('weather_stage_seconds', stage='evaluate_batch'):
+            alerts_by_row = self.alert_evaluator.evaluate([weather_data for _, weather_data in results])
+        processed = {}
+        for (location, weather_data), alerts in zip(results, alerts_by_row):
+            if self.rules and weather_data:
+                alerts.extend(self.rules.evaluate(weather_data))
+            processed[location] = (weather_data, self.process_location(location, weather_data, alerts=alerts))
+        return processed
+
+    def generate_forecast_alerts(self, forecast_data, now=None):
+        """Generate alerts for conditions expected in the forecast, stopping at the first severe step."""
+        return forecast_alerts(forecast_data, self.alert_thresholds, self.units, time.time() if now is None else now)
+
+    def process_forecast(self, location, alerts):
+        """Display and send forecast alerts for one location."""
+        self.output.forecast(location, alerts)
+        self.send_notifications(location, self.alerts_to_notify(location, alerts, 'forecast'))
 
-    def check_locations(self):
-        """Check weather for all configured locations."""
-        for location in self.locations:
-            logger.info(f"Checking weather for {location}")
+    def process_forecast_batch(self, results):
+        """Evaluate forecast alerts for a batch of (location, forecast_data) pairs at once, then process each."""
+        alerts_by_row = self.alert_evaluator.evaluate_forecasts(
+            [forecast_data for _, forecast_data in results], time.time()
+        )
+        for (location, _), alerts in zip(results, alerts_by_row):
+            self.process_forecast(location, alerts)
+
+    def check_forecasts(self, locations=None):
+        """Check the forecast for the given locations (all by default) and alert on upcoming conditions."""
+        if locations is None:
+            locations = self.locations
+        logger.info("Checking forecasts for %s locations", len(locations))
+        
+        pending = []
+        for location, forecast_data in self._recorded('forecast', self.iter_forecasts(locations)):
+            if not forecast_data:
+                logger.warning("No forecast data received for %s", location)
+                continue
             
-            # Fetch current weather
-            weather_data = self.get_current_weather(location)
+            if self.vectorized_alerts:
+                pending.append((location, forecast_data))
+                if len(pending) >= self.vectorized_batch_size:
+                    self.process_forecast_batch(pending)
+                    pending = []
+            else:
+                self.process_forecast(location, self.generate_forecast_alerts(forecast_data))
+        
+        if pending:
+            self.process_forecast_batch(pending)
+
+    def check_locations(self, locations=None):
+        """Check weather for the given locations (all configured locations by default).
+        
+        Returns a dict mapping each checked location to (weather_data, alerts); both are None
+        when no data was received.
+        """
+        profile_path, self.profile_path = self.profile_path, None
+        profiler = None
+        if profile_path:
+            import cProfile
+            profiler = cProfile.Profile()
+        
+        start = time.perf_counter()
+        try:
+            if profiler is not None:
+                results = profiler.runcall(self._check_locations, locations)
+            else:
+                results = self._check_locations(locations)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.metrics.observe('weather_cycle_seconds', elapsed)
+            self.metrics.inc('weather_cycles_total')
+            logger.info("Check cycle finished in %.2f seconds", elapsed)
+        
+        if profiler is not None:
+            self._save_profile(profiler, profile_path)
+        if self.metrics_jsonl:
+            self.metrics.dump_jsonl(self.metrics_jsonl)
+        return results
+
+    def _save_profile(self, profiler, path):
+        """Write a cProfile capture to disk and log the most expensive calls."""
+        import io
+        import pstats
+        
+        profiler.dump_stats(path)
+        summary = io.StringIO()
+        pstats.Stats(profiler, stream=summary).sort_stats('cumulative').print_stats(25)
+        logger.info("Saved cycle profile to %s\n%s", path, summary.getvalue())
+
+    def _check_locations(self, locations):
+        if locations is None:
+            locations = self.locations
+        logger.info("Checking weather for %s locations (concurrency: %s)", len(locations), self.max_concurrency)
+        
+        # Results are processed in the main thread as soon as each fetch completes
+        results = {location: (None, None) for location in locations}
+        pending = []
+        unchanged = 0
+        for location, weather_data in self._recorded('weather', self.iter_current_weather(locations)):
             if not weather_data:
-                logger.warning(f"No weather data received for {location}")
+                logger.warning("No weather data received for %s", location)
                 continue
-                
-            # Display current weather
-            print(f"\n{'-'*50}")
-            print(self.format_weather_display(weather_data, location))
             
-            # Generate and display alerts
-            alerts = self.generate_alerts(weather_data)
-            if alerts:
-                print(f"\nALERTS FOR {location.upper()}:")
-                for alert in alerts:
-                    print(f"[{alert['type'].upper()}] {alert['title']}: {alert['message']}")
-                
-                # Send email notifications
-                self.send_alert_email(location, alerts)
+            # Skip alerting, display and notification for observations already processed
+            alerts = self.unchanged_alerts(location, weather_data)
+            if alerts is not None:
+                results[location] = (weather_data, alerts)
+                unchanged += 1
+                continue
+            
+            if self.vectorized_alerts:
+                pending.append((location, weather_data))
+                if len(pending) >= self.vectorized_batch_size:
+                    results.update(self.process_batch(pending))
+                    pending = []
             else:
-                print(f"\nNo weather alerts for {location}")
+                results[location] = (weather_data, self.process_location(location, weather_data))
+        
+        if pending:
+            results.update(self.process_batch(pending))
+        if unchanged:
+            self.metrics.inc('weather_unchanged_skipped_total', unchanged)
+            logger.info("Skipped %s of %s locations with unchanged observations", unchanged, len(locations))
+        
+        if self.forecast_alerts_enabled:
+            self.check_forecasts(locations)
+        
+        if self.observations is not None:
+            self.observations.publish_results(results)
+        self._end_cycle()
+        return results
+
+    def _end_cycle(self):
+        """Flush the per-cycle batches: output, history, alert state, notifications, caches and capture."""
+        self.output.end_cycle()
+        if self.history is not None:
+            self.history.flush()
+        if self.alert_state is not None:
+            self.alert_state.commit()
+        self.notifier.end_cycle()
+        if self.capture is not None:
+            self.capture.end_cycle()
+        
+        self.cache.save()
+        self.cache.log_stats()
+        if self.bulk_enabled:
+            self.city_index.save()
+
+    def replay(self, path, rate=0, deliver=False):
+        """Push a recorded capture through alerting and formatting without network calls.
+        
+        A rate of 0 replays as fast as possible; otherwise recorded time is compressed by that factor
+        (a rate of 8640 plays a day of traffic in 10 seconds). The replay never touches live state:
+        cooldowns and all-clears are tracked in a scratch in-memory store, nothing is added to the
+        observation history, and notifications are only counted unless deliver is true.
+        """
+        live_state, live_history, live_notifier = self.alert_state, self.history, self.notifier
+        if live_state is not None:
+            self.alert_state = AlertStateStore(':memory:', cooldown=live_state.cooldown, all_clear=live_state.all_clear)
+        self.history = None
+        dry_run = None
+        if not deliver:
+            dry_run = DryRunSink()
+            self.notifier = NotificationRouter({'dry_run': dry_run})
+        try:
+            self._replay(path, rate)
+        finally:
+            if self.alert_state is not None and self.alert_state is not live_state:
+                self.alert_state.close()
+            self.alert_state, self.history, self.notifier = live_state, live_history, live_notifier
+        if dry_run is not None:
+            logger.info("Replay produced %d notifications; none were delivered (use --replay-deliver to send them)",
+                        dry_run.stats['not_delivered'])
+
+    def _replay(self, path, rate):
+        if rate:
+            logger.info("Replaying %s at %sx", path, rate)
+        else:
+            logger.info("Replaying %s as fast as possible", path)
+        
+        replayed = 0
+        first_recorded = None
+        start = time.perf_counter()
+        for record in read_capture(path):
+            if rate:
+                if first_recorded is None:
+                    first_recorded = record['t']
+                delay = (record['t'] - first_recorded) / rate - (time.perf_counter() - start)
+                if delay > 0:
+                    time.sleep(delay)
             
-            print(f"{'-'*50}\n")
+            if record.get('cycle_end'):
+                self._end_cycle()
+            elif record['endpoint'] == 'weather':
+                if self.unchanged_alerts(record['location'], record['data']) is None:
+                    self.process_location(record['location'], record['data'])
+                else:
+                    self.metrics.inc('weather_unchanged_skipped_total')
+                replayed += 1
+            elif record['endpoint'] == 'forecast':
+                self.process_forecast(record['location'], self.generate_forecast_alerts(record['data'], now=record['t']))
+                replayed += 1
+        
+        self._end_cycle()
+        elapsed = time.perf_counter() - start
+        logger.info("Replayed %s responses in %.2f seconds (%.0f responses/second)",
+                    replayed, elapsed, replayed / elapsed if elapsed else 0)
+
+    def print_history_stats(self, field, hours):
+        """Print min/max/mean of a recorded field for every location over the last `hours` hours."""
+        if self.history is None:
+            print("Observation history is disabled. Set enabled = true in the [history] section.")
+            return
+        
+        since = time.time() - hours * 3600
+        rows = [
+            [location, f"{s['min']:.1f}", f"{s['max']:.1f}", f"{s['mean']:.1f}", s['count']]
+            for location, s in sorted(self.history.stats(field, start=since).items())
+        ]
+        from tabulate import tabulate
+        print(tabulate(rows, headers=["Location", "Min", "Max", "Mean", "Samples"], tablefmt="pretty"))
 
     def run_continuous(self, interval=3600):
         """Run the alert system continuously with specified interval."""
-        logger.info(f"Starting continuous monitoring with {interval} seconds interval")
+        if self.adaptive_schedule:
+            return self.run_adaptive(initial_interval=interval)
+        
+        logger.info("Starting continuous monitoring with %s seconds interval", interval)
         
         try:
             while True:
+                if self.reload_enabled:
+                    self.reload_config()
                 self.check_locations()
-                logger.info(f"Sleeping for {interval} seconds before next check")
+                logger.info("Sleeping for %s seconds before next check", interval)
                 time.sleep(interval)
         except KeyboardInterrupt:
             logger.info("Weather alert monitoring stopped by user")
         except Exception as e:
-            logger.error(f"Error in continuous monitoring: {e}")
+            logger.error("Error in continuous monitoring: %s", e)
+        finally:
+            self.close()
+
+    def run_adaptive(self, initial_interval=3600):
+        """Run continuously, polling each location on its own adaptive schedule."""
+        scheduler = AdaptiveScheduler(
+            self.locations,
+            min_interval=self.config.getint('schedule', 'min_interval', fallback=300),
+            max_interval=self.config.getint('schedule', 'max_interval', fallback=3600),
+            initial_interval=initial_interval,
+            requests_per_minute=self.config.getint('schedule', 'requests_per_minute', fallback=60),
+            change_threshold=self.config.getfloat('schedule', 'change_threshold', fallback=5.0)
+        )
+        logger.info("Starting adaptive monitoring of %s locations "
+                    "(%s-%s seconds per location, %s requests per minute)",
+                    len(self.locations), scheduler.min_interval, scheduler.max_interval, scheduler.requests_per_minute)
+        
+        try:
+            while True:
+                if self.reload_enabled:
+                    added, removed = self.reload_config()
+                    for location in removed:
+                        scheduler.remove(location)
+                    for location in added:
+                        scheduler.add(location)
+                due = scheduler.due()
+                if not due:
+                    time.sleep(scheduler.next_wakeup())
+                    continue
+                
+                results = self.check_locations(due)
+                for location, (weather_data, alerts) in results.items():
+                    scheduler.update(location, weather_data, alerts)
+        except KeyboardInterrupt:
+            logger.info("Weather alert monitoring stopped by user")
+        except Exception as e:
+            logger.error("Error in continuous monitoring: %s", e)
+        finally:
+            self.close()
+
+    def run_server(self, interval=3600):
+        """Keep polling in the background while serving the latest observations and alerts over HTTP."""
+        from query_server import ObservationStore, start_query_server
+        self.observations = ObservationStore(max_age=self.cache.ttls['weather'])
+        server = start_query_server(
+            self,
+            self.observations,
+            host=self.config.get('server', 'host', fallback='127.0.0.1'),
+            port=self.config.getint('server', 'port', fallback=8088),
+            read_through=self.config.getboolean('server', 'read_through', fallback=True)
+        )
+        try:
+            self.run_continuous(interval=interval)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+def _startup_mark(label):
+    if startup_profile is not None:
+        startup_profile.mark(label)
 
 
 def main():
     """Main function to run the Weather Alert System."""
+    _startup_mark('imports')
     parser = argparse.ArgumentParser(description="Weather Alert System")
     parser.add_argument('-c', '--config', default='config.ini', help='Path to configuration file')
     parser.add_argument('-i', '--interval', type=int, default=3600, help='Check interval in seconds for continuous mode')
     parser.add_argument('-o', '--once', action='store_true', help='Run once and exit (no continuous monitoring)')
+    parser.add_argument('-f', '--forecast', action='store_true', help='Also alert on conditions expected in the 5-day forecast')
+    parser.add_argument('--profile-cycle', metavar='FILE', help='Capture a cProfile of the first check cycle to FILE')
+    parser.add_argument('--record', metavar='FILE', help='Record every API response to a gzip JSON-lines capture')
+    parser.add_argument('--replay', metavar='FILE', help='Replay a capture through alerting and notification, then exit')
+    parser.add_argument('--replay-rate', type=float, default=0, help='Replay speed-up factor (0 = as fast as possible)')
+    parser.add_argument('--replay-deliver', action='store_true',
+                        help='Send the notifications a replay produces through the configured sinks')
+    parser.add_argument('--history-stats', metavar='FIELD', help='Print min/max/mean of a recorded field per location and exit')
+    parser.add_argument('--window', type=float, default=24, help='Hours of history covered by --history-stats')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='Output format: table, jsonl or none (overrides output_format)')
+    parser.add_argument('--workers', type=int, default=0, help='Split the locations across this many worker processes')
+    parser.add_argument('--shard-map', metavar='FILE', help='JSON shard map shared by several hosts (see usage guide)')
+    parser.add_argument('--host', help='This host\'s name in the shard map (defaults to the hostname)')
+    parser.add_argument('--startup-profile', action='store_true', help='Print an import and startup time breakdown on exit')
+    parser.add_argument('--serve', action='store_true', help='Serve the latest observations and alerts over a local HTTP API while polling')
     args = parser.parse_args()
+    if args.serve and (args.workers > 1 or args.shard_map):
+        parser.error("--serve cannot be combined with --workers or --shard-map")
+    _startup_mark('arguments parsed')
     
     try:
-        weather_system = WeatherAlertSystem(config_file=args.config)
+        sharded = args.workers > 1 or args.shard_map
+        if sharded:
+            # Imported here because the sharding module builds on WeatherAlertSystem
+            from sharding import ShardCoordinator
+            weather_system = ShardCoordinator(config_file=args.config)
+        else:
+            weather_system = WeatherAlertSystem(config_file=args.config)
+        _startup_mark('system initialized')
+        
+        if args.history_stats:
+            weather_system.print_history_stats(args.history_stats, args.window)
+            return 0
+        if args.forecast:
+            weather_system.forecast_alerts_enabled = True
+        if args.format:
+            weather_system.output = create_output(args.format, weather_system.format_weather_display)
+        if args.profile_cycle:
+            weather_system.profile_path = args.profile_cycle
+        if sharded:
+            weather_system.run_sharded(
+                args.config, workers=args.workers, shard_map=args.shard_map, host=args.host,
+                interval=args.interval, once=args.once
+            )
+            return 0
+        if args.replay:
+            weather_system.replay(args.replay, rate=args.replay_rate, deliver=args.replay_deliver)
+            weather_system.close()
+            return 0
+        if args.record:
+            weather_system.capture = CaptureWriter(args.record)
         
-        if args.once:
+        if args.serve:
+            weather_system.run_server(interval=args.interval)
+        elif args.once:
             weather_system.check_locations()
+            weather_system.close()
         else:
             weather_system.run_continuous(interval=args.interval)
             
     except Exception as e:
-        logger.error(f"Error running Weather Alert System: {e}")
+        logger.error("Error running Weather Alert System: %s", e)
         return 1
     
     return 0